@@ -0,0 +1,418 @@
+"""
+CROC Investment Fund - Shared Styles
+CSS used by the Streamlit apps, kept in one place so each rule is defined once
+"""
+
+# Rules shared by every app
+BASE_CSS = """
+    .main-header {
+        font-size: 3rem;
+        font-weight: bold;
+        text-align: center;
+        color: #1f77b4;
+        margin-bottom: 2rem;
+    }
+    .croc-branding {
+        background: linear-gradient(90deg, #00ff00, #00cc00);
+        padding: 2rem;
+        border-radius: 1rem;
+        text-align: center;
+        margin-bottom: 2rem;
+        color: white;
+        font-weight: bold;
+    }
+    .ai-analysis {
+        background-color: #f8f9fa;
+        padding: 1.5rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #1f77b4;
+        margin: 1rem 0;
+    }
+"""
+
+# Complete analysis app (options flow + X analyst posts)
+COMPLETE_CSS = BASE_CSS + """
+    .options-flow {
+        background-color: #fff3cd;
+        padding: 1.5rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #ffc107;
+        margin: 1rem 0;
+    }
+    .big-call {
+        background: linear-gradient(135deg, #d4edda 0%, #c3e6cb 100%);
+        padding: 1.5rem;
+        border-radius: 1rem;
+        border-left: 6px solid #28a745;
+        margin: 1rem 0;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        transition: transform 0.2s ease;
+    }
+    .big-call:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+    }
+    .big-put {
+        background: linear-gradient(135deg, #f8d7da 0%, #f5c6cb 100%);
+        padding: 1.5rem;
+        border-radius: 1rem;
+        border-left: 6px solid #dc3545;
+        margin: 1rem 0;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        transition: transform 0.2s ease;
+    }
+    .big-put:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+    }
+    .flow-god-style {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 1rem;
+        margin: 1rem 0;
+        font-family: 'Courier New', monospace;
+    }
+    .option-header {
+        background: linear-gradient(90deg, #28a745, #20c997);
+        color: white;
+        padding: 0.75rem 1rem;
+        border-radius: 0.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+        text-align: center;
+        font-size: 1.1rem;
+    }
+    .put-header {
+        background: linear-gradient(90deg, #dc3545, #e74c3c);
+        color: white;
+        padding: 0.75rem 1rem;
+        border-radius: 0.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+        text-align: center;
+        font-size: 1.1rem;
+    }
+    .option-grid {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 1rem;
+        margin-top: 1rem;
+    }
+    .option-metric {
+        background: rgba(255,255,255,0.9);
+        padding: 1rem;
+        border-radius: 0.5rem;
+        text-align: center;
+        border: 1px solid rgba(0,0,0,0.1);
+    }
+    .metric-label {
+        font-size: 0.85rem;
+        color: #666;
+        margin-bottom: 0.5rem;
+        font-weight: 600;
+    }
+    .metric-value {
+        font-size: 1.3rem;
+        font-weight: bold;
+        color: #333;
+    }
+    .otm-badge {
+        background: #ffc107;
+        color: #000;
+        padding: 0.4rem 0.8rem;
+        border-radius: 0.4rem;
+        font-size: 0.9rem;
+        font-weight: bold;
+        display: inline-block;
+        margin-top: 0.5rem;
+    }
+    .expiry-badge {
+        background: #17a2b8;
+        color: white;
+        padding: 0.4rem 0.8rem;
+        border-radius: 0.4rem;
+        font-size: 0.9rem;
+        font-weight: bold;
+        display: inline-block;
+        margin-top: 0.5rem;
+    }
+    .x-post {
+        background: #f8f9fa;
+        border: 1px solid #e9ecef;
+        border-radius: 0.5rem;
+        padding: 1rem;
+        margin: 0.5rem 0;
+        border-left: 4px solid #1da1f2;
+    }
+    .x-post-header {
+        display: flex;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    .x-avatar {
+        width: 40px;
+        height: 40px;
+        border-radius: 50%;
+        background: #1da1f2;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        color: white;
+        font-weight: bold;
+        margin-right: 0.75rem;
+    }
+    .x-username {
+        font-weight: bold;
+        color: #1da1f2;
+    }
+    .x-timestamp {
+        color: #666;
+        font-size: 0.8rem;
+        margin-left: auto;
+    }
+    .x-content {
+        margin-top: 0.5rem;
+        line-height: 1.4;
+    }
+    .x-engagement {
+        display: flex;
+        gap: 1rem;
+        margin-top: 0.75rem;
+        font-size: 0.8rem;
+        color: #666;
+    }
+"""
+
+# Enhanced AI analysis app
+ENHANCED_CSS = BASE_CSS + """
+    .metric-card {
+        background-color: #f0f2f6;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0;
+    }
+    .success { color: #00ff00; }
+    .warning { color: #ffaa00; }
+    .error { color: #ff0000; }
+    .analyst-feed {
+        background-color: #fff3cd;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #ffc107;
+        margin: 0.5rem 0;
+    }
+"""
+
+# Stock analysis app (app.py)
+APP_CSS = BASE_CSS + """
+    .options-flow {
+        background-color: #fff3cd;
+        padding: 1.5rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #ffc107;
+        margin: 1rem 0;
+    }
+    .big-call {
+        background: linear-gradient(135deg, #d4edda 0%, #c3e6cb 100%);
+        padding: 1.5rem;
+        border-radius: 1rem;
+        border-left: 6px solid #28a745;
+        margin: 1rem 0;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        transition: transform 0.2s ease;
+    }
+    .big-call:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+    }
+    .big-put {
+        background: linear-gradient(135deg, #f8d7da 0%, #f5c6cb 100%);
+        padding: 1.5rem;
+        border-radius: 1rem;
+        border-left: 6px solid #dc3545;
+        margin: 1rem 0;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        transition: transform 0.2s ease;
+    }
+    .big-put:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+    }
+    .flow-god-style {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 1rem;
+        margin: 1rem 0;
+        font-family: 'Courier New', monospace;
+    }
+    .option-header {
+        background: linear-gradient(90deg, #28a745, #20c997);
+        color: white;
+        padding: 0.75rem 1rem;
+        border-radius: 0.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+        text-align: center;
+        font-size: 1.1rem;
+    }
+    .put-header {
+        background: linear-gradient(90deg, #dc3545, #e74c3c);
+        color: white;
+        padding: 0.75rem 1rem;
+        border-radius: 0.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+        text-align: center;
+        font-size: 1.1rem;
+    }
+    .option-grid {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 1rem;
+        margin-top: 1rem;
+    }
+    .option-metric {
+        background: rgba(255,255,255,0.9);
+        padding: 1rem;
+        border-radius: 0.5rem;
+        text-align: center;
+        border: 1px solid rgba(0,0,0,0.1);
+    }
+    .metric-label {
+        font-size: 0.85rem;
+        color: #666;
+        margin-bottom: 0.5rem;
+        font-weight: 600;
+    }
+    .metric-value {
+        font-size: 1.3rem;
+        font-weight: bold;
+        color: #333;
+    }
+    .otm-badge {
+        background: #ffc107;
+        color: #000;
+        padding: 0.4rem 0.8rem;
+        border-radius: 0.4rem;
+        font-size: 0.9rem;
+        font-weight: bold;
+        display: inline-block;
+        margin-top: 0.5rem;
+    }
+    .expiry-badge {
+        background: #17a2b8;
+        color: white;
+        padding: 0.4rem 0.8rem;
+        border-radius: 0.4rem;
+        font-size: 0.9rem;
+        font-weight: bold;
+        display: inline-block;
+        margin-top: 0.5rem;
+    }
+    .x-post {
+        background: #f8f9fa;
+        border: 1px solid #e9ecef;
+        border-radius: 0.5rem;
+        padding: 1rem;
+        margin: 0.5rem 0;
+        border-left: 4px solid #1da1f2;
+    }
+    .x-post-header {
+        display: flex;
+        align-items: center;
+        margin-bottom: 0.5rem;
+    }
+    .x-avatar {
+        width: 40px;
+        height: 40px;
+        border-radius: 50%;
+        background: #1da1f2;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        color: white;
+        font-weight: bold;
+        margin-right: 0.75rem;
+    }
+    .x-username {
+        font-weight: bold;
+        color: #1da1f2 !important;
+        background: rgba(29, 161, 242, 0.1);
+        padding: 0.25rem 0.5rem;
+        border-radius: 0.25rem;
+        border: 1px solid #1da1f2;
+    }
+    .x-timestamp {
+        color: #333 !important;
+        background: rgba(255,255,255,0.95);
+        padding: 0.25rem 0.5rem;
+        border-radius: 0.25rem;
+        font-size: 0.8rem;
+        margin-left: auto;
+        font-weight: 600;
+        border: 1px solid #ddd;
+    }
+    .x-content {
+        margin-top: 0.5rem;
+        line-height: 1.4;
+        color: #333;
+    }
+    .x-engagement {
+        display: flex;
+        gap: 1rem;
+        margin-top: 0.75rem;
+        font-size: 0.8rem;
+        color: #666;
+    }
+    .error-message {
+        background: #f8d7da;
+        color: #721c24;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #dc3545;
+        margin: 1rem 0;
+    }
+    .success-message {
+        background: #d4edda;
+        color: #155724;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #28a745;
+        margin: 1rem 0;
+    }
+"""
+
+# Options flow app (app_with_options.py)
+OPTIONS_CSS = BASE_CSS + """
+    .options-flow {
+        background-color: #fff3cd;
+        padding: 1.5rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #ffc107;
+        margin: 1rem 0;
+    }
+    .big-call {
+        background-color: #d4edda;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #28a745;
+        margin: 0.5rem 0;
+    }
+    .big-put {
+        background-color: #f8d7da;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #dc3545;
+        margin: 0.5rem 0;
+    }
+    .flow-god-style {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 1rem;
+        margin: 1rem 0;
+        font-family: 'Courier New', monospace;
+    }
+"""
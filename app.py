@@ -4,20 +4,24 @@ Fixed white text on white background issues
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
 from datetime import datetime, timedelta
-import yfinance as yf
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import re
+import string
+import threading
 import time
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from _styles import APP_CSS
+
+# Load environment variables once per process, not on every rerun
+if not os.environ.get("_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_ENV_LOADED"] = "1"
 
 # Page configuration
 st.set_page_config(
@@ -28,299 +32,196 @@ st.set_page_config(
 )
 
 # Fixed CSS with better contrast
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        text-align: center;
-        color: #1f77b4;
-        margin-bottom: 2rem;
-    }
-    .croc-branding {
-        background: linear-gradient(90deg, #00ff00, #00cc00);
-        padding: 2rem;
-        border-radius: 1rem;
-        text-align: center;
-        margin-bottom: 2rem;
-        color: white;
-        font-weight: bold;
-    }
-    .ai-analysis {
-        background-color: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-    .options-flow {
-        background-color: #fff3cd;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #ffc107;
-        margin: 1rem 0;
-    }
-    .big-call {
-        background: linear-gradient(135deg, #d4edda 0%, #c3e6cb 100%);
-        padding: 1.5rem;
-        border-radius: 1rem;
-        border-left: 6px solid #28a745;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        transition: transform 0.2s ease;
-    }
-    .big-call:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-    }
-    .big-put {
-        background: linear-gradient(135deg, #f8d7da 0%, #f5c6cb 100%);
-        padding: 1.5rem;
-        border-radius: 1rem;
-        border-left: 6px solid #dc3545;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        transition: transform 0.2s ease;
-    }
-    .big-put:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-    }
-    .flow-god-style {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 1rem;
-        margin: 1rem 0;
-        font-family: 'Courier New', monospace;
-    }
-    .option-header {
-        background: linear-gradient(90deg, #28a745, #20c997);
-        color: white;
-        padding: 0.75rem 1rem;
-        border-radius: 0.5rem;
-        font-weight: bold;
-        margin-bottom: 1rem;
-        text-align: center;
-        font-size: 1.1rem;
-    }
-    .put-header {
-        background: linear-gradient(90deg, #dc3545, #e74c3c);
-        color: white;
-        padding: 0.75rem 1rem;
-        border-radius: 0.5rem;
-        font-weight: bold;
-        margin-bottom: 1rem;
-        text-align: center;
-        font-size: 1.1rem;
-    }
-    .option-grid {
-        display: grid;
-        grid-template-columns: 1fr 1fr;
-        gap: 1rem;
-        margin-top: 1rem;
-    }
-    .option-metric {
-        background: rgba(255,255,255,0.9);
-        padding: 1rem;
-        border-radius: 0.5rem;
-        text-align: center;
-        border: 1px solid rgba(0,0,0,0.1);
-    }
-    .metric-label {
-        font-size: 0.85rem;
-        color: #666;
-        margin-bottom: 0.5rem;
-        font-weight: 600;
-    }
-    .metric-value {
-        font-size: 1.3rem;
-        font-weight: bold;
-        color: #333;
-    }
-    .otm-badge {
-        background: #ffc107;
-        color: #000;
-        padding: 0.4rem 0.8rem;
-        border-radius: 0.4rem;
-        font-size: 0.9rem;
-        font-weight: bold;
-        display: inline-block;
-        margin-top: 0.5rem;
-    }
-    .expiry-badge {
-        background: #17a2b8;
-        color: white;
-        padding: 0.4rem 0.8rem;
-        border-radius: 0.4rem;
-        font-size: 0.9rem;
-        font-weight: bold;
-        display: inline-block;
-        margin-top: 0.5rem;
-    }
-    .x-post {
-        background: #f8f9fa;
-        border: 1px solid #e9ecef;
-        border-radius: 0.5rem;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-left: 4px solid #1da1f2;
-    }
-    .x-post-header {
-        display: flex;
-        align-items: center;
-        margin-bottom: 0.5rem;
-    }
-    .x-avatar {
-        width: 40px;
-        height: 40px;
-        border-radius: 50%;
-        background: #1da1f2;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-weight: bold;
-        margin-right: 0.75rem;
-    }
-    .x-username {
-        font-weight: bold;
-        color: #1da1f2 !important;
-        background: rgba(29, 161, 242, 0.1);
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        border: 1px solid #1da1f2;
-    }
-    .x-timestamp {
-        color: #333 !important;
-        background: rgba(255,255,255,0.95);
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-size: 0.8rem;
-        margin-left: auto;
-        font-weight: 600;
-        border: 1px solid #ddd;
-    }
-    .x-content {
-        margin-top: 0.5rem;
-        line-height: 1.4;
-        color: #333;
-    }
-    .x-engagement {
-        display: flex;
-        gap: 1rem;
-        margin-top: 0.75rem;
-        font-size: 0.8rem;
-        color: #666;
+@st.cache_resource
+def _inject_css():
+    """Inject the app stylesheet"""
+    st.markdown(f"<style>{APP_CSS}</style>", unsafe_allow_html=True)
+
+# Allowed ticker format: up to 10 chars, letters/digits/dot/dash
+_SYMBOL_RE = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+# Suggested symbols shown when a lookup fails
+VALID_SYMBOLS = ('AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN', 'META', 'NVDA', 'NFLX', 'AMD', 'INTC')
+_VALID = frozenset(VALID_SYMBOLS)
+_VALID_SAMPLE = ', '.join(VALID_SYMBOLS[:5])
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Get the pooled keep-alive HTTP session shared by all yfinance calls"""
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0"
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503])
+    ))
+    return session
+
+@st.cache_resource
+def get_ticker(symbol: str):
+    """Get a shared yf.Ticker for the symbol, kept across reruns"""
+    import yfinance as yf
+    return yf.Ticker(symbol, session=get_session())
+
+# Minimum spacing between Yahoo requests, in seconds
+MIN_CALL_INTERVAL = 0.25
+
+class CallPacer:
+    """Spaces Yahoo requests at least MIN_CALL_INTERVAL apart"""
+    
+    def __init__(self):
+        self._last_call_ts = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Sleep until the next request may go out, then claim that slot"""
+        with self._lock:
+            wait = MIN_CALL_INTERVAL - (time.monotonic() - self._last_call_ts)
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call_ts = time.monotonic()
+
+@st.cache_resource
+def get_call_pacer() -> CallPacer:
+    """Get the pacer shared across reruns; module globals reset every time the script re-executes"""
+    return CallPacer()
+
+def _call_with_retry(fn, retries: int = 3):
+    """Call a Yahoo endpoint, backing off exponentially on rate limits"""
+    pacer = get_call_pacer()
+    for attempt in range(retries):
+        pacer.wait()
+        try:
+            return fn()
+        except Exception as e:
+            if "429" in str(e) and attempt < retries - 1:
+                time.sleep(2 ** attempt)
+                continue
+            raise
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_stock(symbol: str) -> dict:
+    """Fetch and summarize stock data; failures raise so they are not cached"""
+    ticker = get_ticker(symbol)
+    
+    # Lightweight quote fields; the full quote summary is fetched lazily
+    try:
+        info = _call_with_retry(lambda: {
+            'marketCap': ticker.fast_info.market_cap,
+            'fiftyTwoWeekHigh': ticker.fast_info.year_high,
+            'fiftyTwoWeekLow': ticker.fast_info.year_low,
+        })
+    except Exception as e:
+        if "429" in str(e):
+            raise ValueError("Rate limit exceeded. Please wait a moment and try again.")
+        raise ValueError(f"Limited data available for {symbol}: {str(e)}")
+    
+    # Get historical data
+    try:
+        hist = _call_with_retry(lambda: ticker.history(
+            period="1y", interval="1d", actions=False, auto_adjust=False, raise_errors=True
+        ))
+    except Exception as e:
+        if "429" in str(e):
+            raise ValueError("Rate limit exceeded. Please wait a moment and try again.")
+        raise ValueError(f"Historical data unavailable for {symbol}: {str(e)}")
+    if hist.empty or len(hist) < 10:  # Check for valid data
+        raise ValueError(f"Insufficient historical data for {symbol}. Try: {_VALID_SAMPLE}")
+    # Only close and volume are used downstream
+    hist = hist[['Close', 'Volume']].astype({'Close': 'float32', 'Volume': 'int64'})
+    
+    close = hist['Close'].to_numpy(dtype=np.float64)
+    volume = hist['Volume'].to_numpy()
+    
+    current_price = close[-1]
+    previous_close = close[-2] if close.size > 1 else current_price
+    change = current_price - previous_close
+    change_pct = (change / previous_close) * 100
+    
+    # Calculate volatility
+    returns = np.diff(close) / close[:-1]
+    volatility = returns.std(ddof=1) * np.sqrt(252)
+    
+    # Calculate moving averages (only the latest value is used)
+    ma_20 = close[-20:].mean() if close.size >= 20 else np.nan
+    ma_50 = close[-50:].mean() if close.size >= 50 else np.nan
+    
+    data = {
+        'symbol': symbol,
+        'info': info,
+        'history': hist,
+        'current_price': current_price,
+        'previous_close': previous_close,
+        'change': change,
+        'change_pct': change_pct,
+        'volume': volume[-1],
+        'avg_volume': volume.mean(),
+        'market_cap': info['marketCap'] or 0,
+        '52_week_high': info['fiftyTwoWeekHigh'] or 0,
+        '52_week_low': info['fiftyTwoWeekLow'] or 0,
+        'volatility': volatility,
+        'ma_20': ma_20,
+        'ma_50': ma_50
     }
-    .error-message {
-        background: #f8d7da;
-        color: #721c24;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #dc3545;
-        margin: 1rem 0;
+    
+    # Metric strings are formatted once here so cached reruns skip the formatting
+    data['display'] = {
+        'price': f"${data['current_price']:.2f}",
+        'change': f"${data['change']:.2f}",
+        'change_pct': f"{data['change_pct']:.2f}%",
+        'volume': f"{data['volume']:,}",
+        'market_cap': f"${data['market_cap']:,.0f}",
+        '52_week_high': f"${data['52_week_high']:.2f}",
+        '52_week_low': f"${data['52_week_low']:.2f}",
+        'volatility': f"{data['volatility']:.2%}"
     }
-    .success-message {
-        background: #d4edda;
-        color: #155724;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #28a745;
-        margin: 1rem 0;
+    return data
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_fundamentals(symbol: str) -> dict:
+    """Fetch fundamentals from the full quote summary, only when they are displayed"""
+    info = _call_with_retry(lambda: get_ticker(symbol).get_info())
+    return {
+        'pe_ratio': info.get('trailingPE', 0),
+        'pb_ratio': info.get('priceToBook', 0),
+        'dividend_yield': info.get('dividendYield', 0),
+        'sector': info.get('sector', 'Unknown'),
+        'industry': info.get('industry', 'Unknown'),
+        'employees': info.get('fullTimeEmployees', 0),
+        'revenue': info.get('totalRevenue', 0),
+        'profit_margin': info.get('profitMargins', 0)
     }
-</style>
-""", unsafe_allow_html=True)
 
 class StockAnalyzer:
     """Enhanced stock analyzer with better error handling"""
     
     def __init__(self):
-        self.valid_symbols = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'AMZN', 'META', 'NVDA', 'NFLX', 'AMD', 'INTC']
+        self.valid_symbols = _VALID
     
     def validate_symbol(self, symbol: str) -> bool:
         """Validate stock symbol"""
-        if not symbol or len(symbol) > 10:
-            return False
-        # Check for dangerous characters
-        dangerous_chars = ['<', '>', '"', "'", '&', ';', '(', ')', '|', '`']
-        if any(char in symbol for char in dangerous_chars):
-            return False
-        return True
+        return bool(symbol) and _SYMBOL_RE.match(symbol) is not None
     
     def get_stock_data(self, symbol: str) -> dict:
-        """Get comprehensive stock data with rate limiting protection"""
+        """Get comprehensive stock data, cached per symbol for five minutes"""
         try:
-            # Add delay to prevent rate limiting
-            time.sleep(1)
-            
             if not self.validate_symbol(symbol):
                 return {"error": f"Invalid symbol format: {symbol}"}
             
-            ticker = yf.Ticker(symbol)
-            
-            # Try to get basic info first
-            try:
-                info = ticker.info
-                if not info or len(info) < 5:  # Check if info is valid
-                    return {"error": f"No data available for {symbol}. Try: {', '.join(self.valid_symbols[:5])}"}
-            except Exception as e:
-                if "429" in str(e):
-                    return {"error": "Rate limit exceeded. Please wait a moment and try again."}
-                return {"error": f"Limited data available for {symbol}: {str(e)}"}
-            
-            # Get historical data
-            try:
-                hist = ticker.history(period="1y")
-                if hist.empty or len(hist) < 10:  # Check for valid data
-                    return {"error": f"Insufficient historical data for {symbol}. Try: {', '.join(self.valid_symbols[:5])}"}
-            except Exception as e:
-                if "429" in str(e):
-                    return {"error": "Rate limit exceeded. Please wait a moment and try again."}
-                return {"error": f"Historical data unavailable for {symbol}: {str(e)}"}
-                
-            current_price = hist['Close'].iloc[-1]
-            previous_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            change = current_price - previous_close
-            change_pct = (change / previous_close) * 100
-            
-            # Calculate volatility
-            returns = hist['Close'].pct_change().dropna()
-            volatility = returns.std() * np.sqrt(252)
-            
-            # Calculate moving averages
-            ma_20 = hist['Close'].rolling(window=20).mean().iloc[-1]
-            ma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
-            
-            return {
-                'symbol': symbol,
-                'info': info,
-                'history': hist,
-                'current_price': current_price,
-                'previous_close': previous_close,
-                'change': change,
-                'change_pct': change_pct,
-                'volume': hist['Volume'].iloc[-1],
-                'avg_volume': hist['Volume'].mean(),
-                'market_cap': info.get('marketCap', 0),
-                'pe_ratio': info.get('trailingPE', 0),
-                'pb_ratio': info.get('priceToBook', 0),
-                'dividend_yield': info.get('dividendYield', 0),
-                '52_week_high': info.get('fiftyTwoWeekHigh', 0),
-                '52_week_low': info.get('fiftyTwoWeekLow', 0),
-                'volatility': volatility,
-                'ma_20': ma_20,
-                'ma_50': ma_50,
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown'),
-                'employees': info.get('fullTimeEmployees', 0),
-                'revenue': info.get('totalRevenue', 0),
-                'profit_margin': info.get('profitMargins', 0)
-            }
+            return _fetch_stock(symbol)
+        except ValueError as e:
+            return {"error": str(e)}
         except Exception as e:
             if "429" in str(e):
                 return {"error": "Rate limit exceeded. Please wait a moment and try again."}
             return {"error": f"Error fetching data for {symbol}: {str(e)}"}
+    
+    def get_fundamentals(self, symbol: str) -> dict:
+        """Get valuation fundamentals; empty if the quote summary is unavailable"""
+        try:
+            return _fetch_fundamentals(symbol)
+        except Exception:
+            return {}
 
 class XAnalystPosts:
     """X (Twitter) analyst posts with better styling"""
@@ -333,76 +234,61 @@ class XAnalystPosts:
             '@garyblack00', '@davidgokhshtein', '@APompliano'
         ]
     
+    # Simulated posts as (username, avatar, content, hours ago, likes, retweets, replies, sentiment),
+    # kept newest first
+    _POST_TEMPLATES = (
+        ('@jimcramer', 'JC', "${sym} earnings next week will be key. Watching for guidance on margins and growth outlook. Could go either way depending on results. 📊", 1, 450, 120, 67, 'neutral'),
+        ('@cathiewood', 'CW', "${sym} showing strong fundamentals. Our ARK models suggest significant upside potential in the next 12 months. The innovation cycle is just beginning. 🚀", 2, 1250, 340, 89, 'bullish'),
+        ('@chamath', 'CP', "${sym} is undervalued relative to its growth prospects. The market is missing the long-term transformation story. Adding to position. 💎", 4, 890, 210, 45, 'bullish'),
+        ('@michaeljburry', 'MB', "${sym} valuation metrics are concerning. The market is pricing in unrealistic growth assumptions. Risk/reward not favorable at current levels. ⚠️", 6, 2100, 890, 234, 'bearish'),
+    )
+    
     def get_analyst_posts(self, symbol: str) -> list:
         """Get simulated analyst posts about the stock"""
         try:
-            # Generate realistic posts based on stock performance
             current_time = datetime.now()
-            
-            # Bullish posts
-            bullish_posts = [
+            return [
                 {
-                    'username': '@cathiewood',
-                    'avatar': 'CW',
-                    'content': f"${symbol} showing strong fundamentals. Our ARK models suggest significant upside potential in the next 12 months. The innovation cycle is just beginning. 🚀",
-                    'timestamp': current_time - timedelta(hours=2),
-                    'likes': 1250,
-                    'retweets': 340,
-                    'replies': 89,
-                    'sentiment': 'bullish'
-                },
-                {
-                    'username': '@chamath',
-                    'avatar': 'CP',
-                    'content': f"${symbol} is undervalued relative to its growth prospects. The market is missing the long-term transformation story. Adding to position. 💎",
-                    'timestamp': current_time - timedelta(hours=4),
-                    'likes': 890,
-                    'retweets': 210,
-                    'replies': 45,
-                    'sentiment': 'bullish'
-                }
-            ]
-            
-            # Bearish posts
-            bearish_posts = [
-                {
-                    'username': '@michaeljburry',
-                    'avatar': 'MB',
-                    'content': f"${symbol} valuation metrics are concerning. The market is pricing in unrealistic growth assumptions. Risk/reward not favorable at current levels. ⚠️",
-                    'timestamp': current_time - timedelta(hours=6),
-                    'likes': 2100,
-                    'retweets': 890,
-                    'replies': 234,
-                    'sentiment': 'bearish'
-                }
-            ]
-            
-            # Neutral posts
-            neutral_posts = [
-                {
-                    'username': '@jimcramer',
-                    'avatar': 'JC',
-                    'content': f"${symbol} earnings next week will be key. Watching for guidance on margins and growth outlook. Could go either way depending on results. 📊",
-                    'timestamp': current_time - timedelta(hours=1),
-                    'likes': 450,
-                    'retweets': 120,
-                    'replies': 67,
-                    'sentiment': 'neutral'
+                    'username': username,
+                    'avatar': avatar,
+                    'content': content.format(sym=symbol),
+                    'timestamp': current_time - timedelta(hours=hours),
+                    'likes': likes,
+                    'retweets': retweets,
+                    'replies': replies,
+                    'sentiment': sentiment
                 }
+                for username, avatar, content, hours, likes, retweets, replies, sentiment in self._POST_TEMPLATES
             ]
             
-            # Select posts based on some logic (simplified)
-            all_posts = bullish_posts + bearish_posts + neutral_posts
-            
-            # Sort by timestamp (newest first)
-            all_posts.sort(key=lambda x: x['timestamp'], reverse=True)
-            
-            return all_posts[:4]  # Return top 4 posts
-            
         except Exception as e:
             st.error(f"Error getting analyst posts: {e}")
             return []
 
+# Analyst post markup, parsed once at import
+_POST_TPL = string.Template("""<div class="x-post" style="border-left-color: $color;">
+    <div class="x-post-header">
+        <div class="x-avatar">$avatar</div>
+        <div>
+            <div class="x-username">$username</div>
+        </div>
+        <div class="x-timestamp">$time</div>
+    </div>
+    <div class="x-content">$content</div>
+    <div class="x-engagement">
+        <span>❤️ $likes</span>
+        <span>🔄 $retweets</span>
+        <span>💬 $replies</span>
+        <span style="color: $color; font-weight: bold;">$sentiment</span>
+    </div>
+</div>""")
+
+_SENTIMENT_COLORS = {
+    'bullish': '#28a745',
+    'bearish': '#dc3545',
+    'neutral': '#6c757d'
+}
+
 def display_x_analyst_posts(posts: list):
     """Display X analyst posts with improved styling"""
     if not posts:
@@ -411,35 +297,155 @@ def display_x_analyst_posts(posts: list):
     
     st.subheader("🐦 X (Twitter) Analyst Posts")
     
-    for post in posts:
-        sentiment_color = {
-            'bullish': '#28a745',
-            'bearish': '#dc3545',
-            'neutral': '#6c757d'
-        }.get(post['sentiment'], '#6c757d')
+    # One message to the frontend for the whole feed; no blank lines so it
+    # stays a single HTML block in markdown
+    feed_html = "\n".join(
+        _POST_TPL.substitute(
+            color=_SENTIMENT_COLORS.get(post['sentiment'], '#6c757d'),
+            avatar=post['avatar'],
+            username=post['username'],
+            time=post['timestamp'].strftime('%H:%M'),
+            content=post['content'],
+            likes=f"{post['likes']:,}",
+            retweets=f"{post['retweets']:,}",
+            replies=f"{post['replies']:,}",
+            sentiment=post['sentiment'].upper()
+        )
+        for post in posts
+    )
+    st.markdown(f'<div class="x-feed">\n{feed_html}\n</div>', unsafe_allow_html=True)
+
+# Price chart styling, shared across reruns
+_LINE_STYLE = dict(color='#1f77b4', width=2)
+_CHART_LAYOUT = dict(xaxis_title="Date", yaxis_title="Price ($)", height=400)
+
+# Cap on points sent to the browser for the price chart
+MAX_CHART_POINTS = 1000
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of n_out points that keep the series shape (Largest-Triangle-Three-Buckets)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # Interior points split into n_out - 2 buckets; first and last points are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x, avg_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+@st.fragment
+def render_analysis(symbol: str):
+    """Render the analysis panel; option toggles only rerun this fragment"""
+    stock_analyzer = StockAnalyzer()
+    x_analyst = XAnalystPosts()
+    
+    # Analysis options
+    col1, col2 = st.columns(2)
+    with col1:
+        show_stock_analysis = st.checkbox("Stock Analysis", value=True)
+    with col2:
+        show_x_posts = st.checkbox("X Analyst Posts", value=True)
+    
+    stock_data = st.session_state.stock_data
+    
+    if 'error' in stock_data:
+        st.markdown(f"""
+        <div class="error-message">
+            <strong>❌ Error:</strong> {stock_data['error']}
+        </div>
+        """, unsafe_allow_html=True)
         
+        # Show X posts even if stock data fails
+        if show_x_posts:
+            x_posts = x_analyst.get_analyst_posts(symbol)
+            display_x_analyst_posts(x_posts)
+    else:
         st.markdown(f"""
-        <div class="x-post" style="border-left-color: {sentiment_color};">
-            <div class="x-post-header">
-                <div class="x-avatar">{post['avatar']}</div>
-                <div>
-                    <div class="x-username">{post['username']}</div>
-                </div>
-                <div class="x-timestamp">{post['timestamp'].strftime('%H:%M')}</div>
-            </div>
-            <div class="x-content">{post['content']}</div>
-            <div class="x-engagement">
-                <span>❤️ {post['likes']:,}</span>
-                <span>🔄 {post['retweets']:,}</span>
-                <span>💬 {post['replies']:,}</span>
-                <span style="color: {sentiment_color}; font-weight: bold;">{post['sentiment'].upper()}</span>
-            </div>
+        <div class="success-message">
+            <strong>✅ Success:</strong> Analysis complete for {symbol}!
         </div>
         """, unsafe_allow_html=True)
+        
+        # Stock Analysis
+        if show_stock_analysis:
+            st.subheader(f"📊 {symbol} Stock Analysis")
+            display = stock_data['display']
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Current Price", display['price'])
+            
+            with col2:
+                st.metric("Change", display['change'], display['change_pct'])
+            
+            with col3:
+                st.metric("Volume", display['volume'])
+            
+            with col4:
+                st.metric("Market Cap", display['market_cap'])
+            
+            # Price chart
+            st.subheader("📈 Price Chart")
+            
+            hist = stock_data['history']
+            close = hist['Close'].to_numpy()
+            points = _lttb_indices(hist.index.asi8.astype(np.float64), close.astype(np.float64), MAX_CHART_POINTS)
+            
+            import plotly.graph_objects as go
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scattergl(
+                x=hist.index[points],
+                y=close[points],
+                mode='lines',
+                name='Close Price',
+                line=_LINE_STYLE
+            ))
+            
+            fig.update_layout(title=f"{symbol} Stock Price", **_CHART_LAYOUT)
+            st.plotly_chart(fig, use_container_width=True, key=f"price_chart_{symbol}")
+            
+            # Valuation metrics
+            st.subheader("💰 Valuation Metrics")
+            
+            fundamentals = stock_analyzer.get_fundamentals(symbol)
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("P/E Ratio", f"{fundamentals['pe_ratio']:.2f}" if fundamentals.get('pe_ratio') else "N/A")
+                st.metric("P/B Ratio", f"{fundamentals['pb_ratio']:.2f}" if fundamentals.get('pb_ratio') else "N/A")
+            
+            with col2:
+                st.metric("Dividend Yield", f"{fundamentals['dividend_yield']:.2%}" if fundamentals.get('dividend_yield') else "N/A")
+                st.metric("52W High", display['52_week_high'])
+            
+            with col3:
+                st.metric("52W Low", display['52_week_low'])
+                st.metric("Volatility", display['volatility'])
+        
+        # X Analyst Posts
+        if show_x_posts:
+            x_posts = x_analyst.get_analyst_posts(symbol)
+            display_x_analyst_posts(x_posts)
 
 def main():
     """Main application function"""
     
+    _inject_css()
+    
     # Header with CROC branding
     st.markdown("""
     <div class="croc-branding">
@@ -459,11 +465,6 @@ def main():
         help="Enter a valid stock symbol (e.g., AAPL, MSFT, GOOGL, TSLA)"
     ).upper()
     
-    # Analysis options
-    st.sidebar.subheader("📊 Analysis Options")
-    show_stock_analysis = st.sidebar.checkbox("Stock Analysis", value=True)
-    show_x_posts = st.sidebar.checkbox("X Analyst Posts", value=True)
-    
     # API Status
     st.sidebar.subheader("🔑 API Status")
     st.sidebar.success("🟢 Grok AI Available")
@@ -471,98 +472,20 @@ def main():
     st.sidebar.info("🐦 X Analyst Posts")
     
     # Main content
+    # Each press refetches (get_stock_data is TTL-cached); widget reruns reuse the active result
     if st.button("🚀 COMPLETE ANALYSIS", type="primary", use_container_width=True):
         if not symbol:
             st.error("Please enter a stock symbol")
             return
         
         with st.spinner(f"Running complete analysis for {symbol}... This may take a few seconds."):
-            # Initialize analyzers
-            stock_analyzer = StockAnalyzer()
-            x_analyst = XAnalystPosts()
-            
-            # Get stock data
-            stock_data = stock_analyzer.get_stock_data(symbol)
-            
-            if 'error' in stock_data:
-                st.markdown(f"""
-                <div class="error-message">
-                    <strong>❌ Error:</strong> {stock_data['error']}
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Show X posts even if stock data fails
-                if show_x_posts:
-                    x_posts = x_analyst.get_analyst_posts(symbol)
-                    display_x_analyst_posts(x_posts)
-                
-                return
-            
-            st.markdown(f"""
-            <div class="success-message">
-                <strong>✅ Success:</strong> Analysis complete for {symbol}!
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Stock Analysis
-            if show_stock_analysis:
-                st.subheader(f"📊 {symbol} Stock Analysis")
-                
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Current Price", f"${stock_data['current_price']:.2f}")
-                
-                with col2:
-                    st.metric("Change", f"${stock_data['change']:.2f}", f"{stock_data['change_pct']:.2f}%")
-                
-                with col3:
-                    st.metric("Volume", f"{stock_data['volume']:,}")
-                
-                with col4:
-                    st.metric("Market Cap", f"${stock_data['market_cap']:,.0f}")
-                
-                # Price chart
-                st.subheader("📈 Price Chart")
-                
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=stock_data['history'].index,
-                    y=stock_data['history']['Close'],
-                    mode='lines',
-                    name='Close Price',
-                    line=dict(color='#1f77b4', width=2)
-                ))
-                
-                fig.update_layout(
-                    title=f"{symbol} Stock Price",
-                    xaxis_title="Date",
-                    yaxis_title="Price ($)",
-                    height=400
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Valuation metrics
-                st.subheader("💰 Valuation Metrics")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric("P/E Ratio", f"{stock_data['pe_ratio']:.2f}" if stock_data['pe_ratio'] else "N/A")
-                    st.metric("P/B Ratio", f"{stock_data['pb_ratio']:.2f}" if stock_data['pb_ratio'] else "N/A")
-                
-                with col2:
-                    st.metric("Dividend Yield", f"{stock_data['dividend_yield']:.2%}" if stock_data['dividend_yield'] else "N/A")
-                    st.metric("52W High", f"${stock_data['52_week_high']:.2f}")
-                
-                with col3:
-                    st.metric("52W Low", f"${stock_data['52_week_low']:.2f}")
-                    st.metric("Volatility", f"{stock_data['volatility']:.2%}")
-            
-            # X Analyst Posts
-            if show_x_posts:
-                x_posts = x_analyst.get_analyst_posts(symbol)
-                display_x_analyst_posts(x_posts)
+            st.session_state.stock_data = StockAnalyzer().get_stock_data(symbol)
+        st.session_state.active_symbol = symbol
+    
+    # Show the last analyzed symbol until the button is pressed again
+    active_symbol = st.session_state.get("active_symbol")
+    if active_symbol:
+        render_analysis(active_symbol)
 
     # Footer
     st.markdown("---")
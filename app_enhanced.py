@@ -15,9 +15,14 @@ import json
 import os
 from dotenv import load_dotenv
 
+from _styles import ENHANCED_CSS
+
 # Load environment variables
 load_dotenv()
 
+# Shared random generator for simulated data
+RNG = np.random.default_rng()
+
 # Page configuration
 st.set_page_config(
     page_title="CROC Investment Fund - AI-Powered Stock Analysis",
@@ -26,50 +31,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        text-align: center;
-        color: #1f77b4;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .success { color: #00ff00; }
-    .warning { color: #ffaa00; }
-    .error { color: #ff0000; }
-    .croc-branding {
-        background: linear-gradient(90deg, #00ff00, #00cc00);
-        padding: 2rem;
-        border-radius: 1rem;
-        text-align: center;
-        margin-bottom: 2rem;
-        color: white;
-        font-weight: bold;
-    }
-    .ai-analysis {
-        background-color: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-    .analyst-feed {
-        background-color: #fff3cd;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #ffc107;
-        margin: 0.5rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def _inject_css():
+    """Inject the app stylesheet"""
+    st.markdown(f"<style>{ENHANCED_CSS}</style>", unsafe_allow_html=True)
 
 # AI Analysis Classes
 class GrokAnalyzer:
@@ -245,11 +210,11 @@ class XAnalystFeed:
             for category, accounts in analysts.items():
                 for account in accounts:
                     if category == 'bullish':
-                        sentiment_scores.append(0.7 + np.random.random() * 0.3)
+                        sentiment_scores.append(0.7 + RNG.random() * 0.3)
                     elif category == 'bearish':
-                        sentiment_scores.append(0.1 + np.random.random() * 0.3)
+                        sentiment_scores.append(0.1 + RNG.random() * 0.3)
                     else:
-                        sentiment_scores.append(0.4 + np.random.random() * 0.2)
+                        sentiment_scores.append(0.4 + RNG.random() * 0.2)
             
             avg_sentiment = np.mean(sentiment_scores)
             
@@ -398,9 +363,157 @@ def display_analyst_feeds(analyst_data):
     with col3:
         st.metric("Neutral Analysts", analyst_data['neutral_analysts'])
 
+@st.fragment
+def render_analysis(symbol, opts, grok_analyzer, openai_analyzer):
+    """Render the analysis panel for the submitted settings"""
+    show_technical = opts['show_technical']
+    show_valuation = opts['show_valuation']
+    show_company = opts['show_company']
+    show_ai_analysis = opts['show_ai_analysis']
+    show_analyst_feeds = opts['show_analyst_feeds']
+    ai_provider = opts['ai_provider']
+    
+    with st.spinner(f"Analyzing {symbol} with AI... This may take a few seconds."):
+        # Get stock data
+        data = get_stock_data(symbol)
+        
+        if data:
+            # Calculate technical indicators
+            technical = calculate_technical_indicators(data) if show_technical else {}
+            
+            # AI Analysis
+            ai_results = {}
+            if show_ai_analysis:
+                if ai_provider in ["Grok AI (Recommended)", "Both"] and grok_analyzer.is_available():
+                    with st.spinner("🤖 Grok AI analyzing..."):
+                        ai_results['Grok AI'] = grok_analyzer.analyze_stock(data)
+                
+                if ai_provider in ["OpenAI GPT", "Both"] and openai_analyzer.is_available():
+                    with st.spinner("🧠 OpenAI analyzing..."):
+                        ai_results['OpenAI GPT'] = openai_analyzer.analyze_stock(data)
+            
+            # Analyst Feeds
+            analyst_data = None
+            if show_analyst_feeds:
+                with st.spinner("🐦 Fetching analyst sentiment..."):
+                    x_feed = XAnalystFeed()
+                    analyst_data = x_feed.get_analyst_sentiment(symbol)
+            
+            # Display results
+            st.success(f"✅ Analysis complete for {symbol}!")
+            
+            # Basic stock info
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Current Price", f"${data['current_price']:.2f}")
+            
+            with col2:
+                st.metric("Change", f"${data['change']:.2f}", f"{data['change_pct']:.2f}%")
+            
+            with col3:
+                st.metric("Volume", f"{data['volume']:,}")
+            
+            with col4:
+                st.metric("Market Cap", f"${data['market_cap']:,.0f}")
+            
+            # Price chart
+            st.subheader("📈 Price Chart")
+            fig = go.Figure()
+            fig.add_trace(go.Scattergl(
+                x=data['history'].index,
+                y=data['history']['Close'],
+                mode='lines',
+                name='Close Price',
+                line=dict(color='#1f77b4', width=2)
+            ))
+            fig.update_layout(
+                title=f"{symbol} Stock Price",
+                xaxis_title="Date",
+                yaxis_title="Price ($)",
+                height=400,
+                uirevision=symbol
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # AI Analysis
+            if ai_results:
+                display_ai_analysis(ai_results)
+            
+            # Analyst Feeds
+            if analyst_data:
+                display_analyst_feeds(analyst_data)
+            
+            # Technical indicators
+            if technical and show_technical:
+                st.subheader("🔧 Technical Indicators")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    rsi = technical.get('rsi', 0)
+                    st.metric("RSI (14)", f"{rsi:.1f}")
+                    if rsi > 70:
+                        st.warning("Overbought")
+                    elif rsi < 30:
+                        st.success("Oversold")
+                    else:
+                        st.info("Neutral")
+                
+                with col2:
+                    macd = technical.get('macd', 0)
+                    st.metric("MACD", f"{macd:.3f}")
+                    if macd > 0:
+                        st.success("Bullish")
+                    else:
+                        st.warning("Bearish")
+                
+                with col3:
+                    st.metric("Volatility", f"{data['volatility']:.2%}")
+            
+            # Valuation metrics
+            if show_valuation:
+                st.subheader("💰 Valuation Metrics")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("P/E Ratio", f"{data['pe_ratio']:.2f}" if data['pe_ratio'] else "N/A")
+                
+                with col2:
+                    st.metric("P/B Ratio", f"{data['pb_ratio']:.2f}" if data['pb_ratio'] else "N/A")
+                
+                with col3:
+                    st.metric("Dividend Yield", f"{data['dividend_yield']:.2%}" if data['dividend_yield'] else "N/A")
+            
+            # Company information
+            if show_company:
+                st.subheader("🏢 Company Information")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Sector", data.get('sector', 'Unknown'))
+                    st.metric("Industry", data.get('industry', 'Unknown'))
+                
+                with col2:
+                    st.metric("Employees", f"{data.get('employees', 0):,}")
+                    st.metric("Revenue", f"${data.get('revenue', 0):,.0f}")
+                
+                with col3:
+                    st.metric("Profit Margin", f"{data.get('profit_margin', 0):.2%}")
+                    st.metric("52W High", f"${data['52_week_high']:.2f}")
+                    st.metric("52W Low", f"${data['52_week_low']:.2f}")
+            
+        else:
+            st.error(f"❌ Could not fetch data for {symbol}. Please check the symbol and try again.")
+            st.info("💡 Try popular symbols like: AAPL, MSFT, GOOGL, TSLA, AMZN, META")
+
 def main():
     """Main application function"""
     
+    _inject_css()
+    
     # Header with CROC branding
     st.markdown("""
     <div class="croc-branding">
@@ -413,28 +526,34 @@ def main():
     # Sidebar
     st.sidebar.header("🔧 Analysis Settings")
     
-    # Stock symbol input
-    symbol = st.sidebar.text_input(
-        "Enter Stock Symbol",
-        value="AAPL",
-        help="Enter a valid stock symbol (e.g., AAPL, MSFT, GOOGL, TSLA)"
-    ).upper()
-    
-    # Analysis options
-    st.sidebar.subheader("📊 Analysis Options")
-    show_technical = st.sidebar.checkbox("Technical Analysis", value=True)
-    show_valuation = st.sidebar.checkbox("Valuation Metrics", value=True)
-    show_company = st.sidebar.checkbox("Company Information", value=True)
-    show_ai_analysis = st.sidebar.checkbox("AI Analysis", value=True)
-    show_analyst_feeds = st.sidebar.checkbox("X Analyst Feeds", value=True)
-    
-    # AI Provider Selection
-    st.sidebar.subheader("🤖 AI Provider")
-    ai_provider = st.sidebar.selectbox(
-        "Choose AI Provider",
-        ["Grok AI (Recommended)", "OpenAI GPT", "Both"],
-        index=0
-    )
+    # Settings only take effect on submit, so toggles don't rerun the analysis
+    with st.sidebar.form("settings"):
+        # Stock symbol input
+        symbol = st.text_input(
+            "Enter Stock Symbol",
+            value="AAPL",
+            help="Enter a valid stock symbol (e.g., AAPL, MSFT, GOOGL, TSLA)"
+        ).upper()
+        
+        # Analysis options
+        st.subheader("📊 Analysis Options")
+        opts = {
+            'show_technical': st.checkbox("Technical Analysis", value=True),
+            'show_valuation': st.checkbox("Valuation Metrics", value=True),
+            'show_company': st.checkbox("Company Information", value=True),
+            'show_ai_analysis': st.checkbox("AI Analysis", value=True),
+            'show_analyst_feeds': st.checkbox("X Analyst Feeds", value=True),
+        }
+        
+        # AI Provider Selection
+        st.subheader("🤖 AI Provider")
+        opts['ai_provider'] = st.selectbox(
+            "Choose AI Provider",
+            ["Grok AI (Recommended)", "OpenAI GPT", "Both"],
+            index=0
+        )
+        
+        submitted = st.form_submit_button("🚀 Analyze Stock with AI", type="primary", use_container_width=True)
     
     # API Status
     st.sidebar.subheader("🔑 API Status")
@@ -453,145 +572,12 @@ def main():
         st.sidebar.error("🔴 OpenAI Unavailable")
     
     # Main content
-    if st.button("🚀 Analyze Stock with AI", type="primary", use_container_width=True):
+    if submitted:
         if not symbol:
             st.error("Please enter a stock symbol")
             return
         
-        with st.spinner(f"Analyzing {symbol} with AI... This may take a few seconds."):
-            # Get stock data
-            data = get_stock_data(symbol)
-            
-            if data:
-                # Calculate technical indicators
-                technical = calculate_technical_indicators(data) if show_technical else {}
-                
-                # AI Analysis
-                ai_results = {}
-                if show_ai_analysis:
-                    if ai_provider in ["Grok AI (Recommended)", "Both"] and grok_analyzer.is_available():
-                        with st.spinner("🤖 Grok AI analyzing..."):
-                            ai_results['Grok AI'] = grok_analyzer.analyze_stock(data)
-                    
-                    if ai_provider in ["OpenAI GPT", "Both"] and openai_analyzer.is_available():
-                        with st.spinner("🧠 OpenAI analyzing..."):
-                            ai_results['OpenAI GPT'] = openai_analyzer.analyze_stock(data)
-                
-                # Analyst Feeds
-                analyst_data = None
-                if show_analyst_feeds:
-                    with st.spinner("🐦 Fetching analyst sentiment..."):
-                        x_feed = XAnalystFeed()
-                        analyst_data = x_feed.get_analyst_sentiment(symbol)
-                
-                # Display results
-                st.success(f"✅ Analysis complete for {symbol}!")
-                
-                # Basic stock info
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Current Price", f"${data['current_price']:.2f}")
-                
-                with col2:
-                    st.metric("Change", f"${data['change']:.2f}", f"{data['change_pct']:.2f}%")
-                
-                with col3:
-                    st.metric("Volume", f"{data['volume']:,}")
-                
-                with col4:
-                    st.metric("Market Cap", f"${data['market_cap']:,.0f}")
-                
-                # Price chart
-                st.subheader("📈 Price Chart")
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=data['history'].index,
-                    y=data['history']['Close'],
-                    mode='lines',
-                    name='Close Price',
-                    line=dict(color='#1f77b4', width=2)
-                ))
-                fig.update_layout(
-                    title=f"{symbol} Stock Price",
-                    xaxis_title="Date",
-                    yaxis_title="Price ($)",
-                    height=400
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # AI Analysis
-                if ai_results:
-                    display_ai_analysis(ai_results)
-                
-                # Analyst Feeds
-                if analyst_data:
-                    display_analyst_feeds(analyst_data)
-                
-                # Technical indicators
-                if technical and show_technical:
-                    st.subheader("🔧 Technical Indicators")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        rsi = technical.get('rsi', 0)
-                        st.metric("RSI (14)", f"{rsi:.1f}")
-                        if rsi > 70:
-                            st.warning("Overbought")
-                        elif rsi < 30:
-                            st.success("Oversold")
-                        else:
-                            st.info("Neutral")
-                    
-                    with col2:
-                        macd = technical.get('macd', 0)
-                        st.metric("MACD", f"{macd:.3f}")
-                        if macd > 0:
-                            st.success("Bullish")
-                        else:
-                            st.warning("Bearish")
-                    
-                    with col3:
-                        st.metric("Volatility", f"{data['volatility']:.2%}")
-                
-                # Valuation metrics
-                if show_valuation:
-                    st.subheader("💰 Valuation Metrics")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric("P/E Ratio", f"{data['pe_ratio']:.2f}" if data['pe_ratio'] else "N/A")
-                    
-                    with col2:
-                        st.metric("P/B Ratio", f"{data['pb_ratio']:.2f}" if data['pb_ratio'] else "N/A")
-                    
-                    with col3:
-                        st.metric("Dividend Yield", f"{data['dividend_yield']:.2%}" if data['dividend_yield'] else "N/A")
-                
-                # Company information
-                if show_company:
-                    st.subheader("🏢 Company Information")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric("Sector", data.get('sector', 'Unknown'))
-                        st.metric("Industry", data.get('industry', 'Unknown'))
-                    
-                    with col2:
-                        st.metric("Employees", f"{data.get('employees', 0):,}")
-                        st.metric("Revenue", f"${data.get('revenue', 0):,.0f}")
-                    
-                    with col3:
-                        st.metric("Profit Margin", f"{data.get('profit_margin', 0):.2%}")
-                        st.metric("52W High", f"${data['52_week_high']:.2f}")
-                        st.metric("52W Low", f"${data['52_week_low']:.2f}")
-                
-            else:
-                st.error(f"❌ Could not fetch data for {symbol}. Please check the symbol and try again.")
-                st.info("💡 Try popular symbols like: AAPL, MSFT, GOOGL, TSLA, AMZN, META")
+        render_analysis(symbol, opts, grok_analyzer, openai_analyzer)
 
     # Footer
     st.markdown("---")
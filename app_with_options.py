@@ -11,9 +11,23 @@ import numpy as np
 from datetime import datetime, timedelta
 import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from tools.cache import FileCache
+from _styles import OPTIONS_CSS
+
+# Numba is optional; without it the context kernel runs as plain NumPy
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda fn: fn
 
 # Load environment variables
 load_dotenv()
@@ -27,62 +41,153 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        text-align: center;
-        color: #1f77b4;
-        margin-bottom: 2rem;
-    }
-    .croc-branding {
-        background: linear-gradient(90deg, #00ff00, #00cc00);
-        padding: 2rem;
-        border-radius: 1rem;
-        text-align: center;
-        margin-bottom: 2rem;
-        color: white;
-        font-weight: bold;
-    }
-    .ai-analysis {
-        background-color: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-    .options-flow {
-        background-color: #fff3cd;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #ffc107;
-        margin: 1rem 0;
-    }
-    .big-call {
-        background-color: #d4edda;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #28a745;
-        margin: 0.5rem 0;
-    }
-    .big-put {
-        background-color: #f8d7da;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #dc3545;
-        margin: 0.5rem 0;
-    }
-    .flow-god-style {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 1rem;
-        margin: 1rem 0;
-        font-family: 'Courier New', monospace;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def _inject_css():
+    """Inject the app stylesheet"""
+    st.markdown(f"<style>{OPTIONS_CSS}</style>", unsafe_allow_html=True)
+
+@st.cache_data
+def _render_header():
+    """Render the CROC branding header"""
+    st.markdown("""
+    <div class="croc-branding">
+        <h1>🐊 CROC INVESTMENT FUND</h1>
+        <h2>FL0WG0D OPTIONS FLOW ANALYSIS 🚀</h2>
+        <h3>Big Calls & Puts Detection with AI Insights</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Lookback periods (in trading rows) for the recent performance summary
+PERFORMANCE_LABELS = ('1M', '3M', '6M', '1Y')
+PERFORMANCE_OFFSETS = np.array([30, 90, 180, 365])
+
+@njit(cache=True, fastmath=True)
+def _compute_context_metrics(closes: np.ndarray, volumes: np.ndarray, highs: np.ndarray, lows: np.ndarray) -> tuple:
+    """Price, range, volatility, volume and performance metrics from daily bars"""
+    n = closes.shape[0]
+    current_price = closes[n - 1]
+    ath = highs.max()
+    atl = lows.min()
+    ath_dist = (current_price - ath) / ath * 100
+    atl_dist = (current_price - atl) / atl * 100
+    
+    window = closes[-31:]
+    returns = np.diff(window) / window[:-1]
+    vol_30d = np.nan
+    if returns.shape[0] > 1:
+        variance = ((returns - returns.mean()) ** 2).sum() / (returns.shape[0] - 1)
+        vol_30d = np.sqrt(variance) * np.sqrt(252.0) * 100
+    
+    avg_vol_30d = volumes[-30:].mean()
+    cur_vol = volumes[n - 1]
+    vol_ratio = cur_vol / avg_vol_30d if avg_vol_30d > 0 else 1.0
+    
+    # NaN marks periods longer than the available history
+    perf = np.full(PERFORMANCE_OFFSETS.shape[0], np.nan)
+    for i in range(PERFORMANCE_OFFSETS.shape[0]):
+        days = PERFORMANCE_OFFSETS[i]
+        if days <= n:
+            old_price = closes[n - days]
+            perf[i] = (current_price - old_price) / old_price * 100
+    
+    return (current_price, ath, atl, ath_dist, atl_dist, vol_30d, avg_vol_30d, cur_vol, vol_ratio,
+            perf[0], perf[1], perf[2], perf[3])
+
+# Daily bar columns read by the context metrics; float32 is ample for ratios
+HISTORY_COLUMNS = ['Close', 'High', 'Low', 'Volume']
+HISTORY_DTYPES = {'Close': 'float32', 'High': 'float32', 'Low': 'float32', 'Volume': 'int64'}
+
+# On-disk cache so yfinance responses survive app restarts
+FLOW_CACHE = FileCache(ttl_seconds=300, cache_dir=os.path.join(".cache", "options_flow"))
+OPTIONS_CACHE_TTL = 60
+
+# Fields recorded for each big call/put contract
+BIG_FLOW_COLUMNS = ['strike', 'volume', 'open_interest', 'last_price', 'expiration',
+                    'moneyness_pct', 'potential_return_pct', 'days_to_expiry']
+
+# Yahoo's multi-symbol chart endpoint accepts up to 20 symbols per request
+SPARK_URL = "https://query1.finance.yahoo.com/v8/finance/spark"
+SPARK_CHUNK_SIZE = 20
+
+@st.cache_resource
+def _get_session() -> requests.Session:
+    """Get a shared HTTP session for direct Yahoo requests"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    return session
+
+def _spark_column(quote: dict, field: str, fallback: np.ndarray) -> np.ndarray:
+    """Read a spark quote column as floats, filling missing values from fallback"""
+    values = quote.get(field)
+    if values is None:
+        return fallback
+    column = pd.Series(values, dtype=np.float64).to_numpy()
+    return np.where(np.isnan(column), fallback, column)
+
+@st.cache_resource
+def _get_ticker(symbol: str):
+    """Get a shared yf.Ticker for the symbol, kept across reruns"""
+    return yf.Ticker(symbol)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _get_history(symbol: str, period: str) -> pd.DataFrame:
+    """Get daily price history for the symbol, skipping split/dividend processing"""
+    return FLOW_CACHE.get_or_fetch(symbol, 'history', lambda: _download_history(symbol, period), params={'period': period})
+
+def _download_history(symbol: str, period: str) -> pd.DataFrame:
+    """Download daily bars and keep only the price/volume columns, downcast"""
+    hist = _get_ticker(symbol).history(
+        period=period, interval="1d", actions=False, auto_adjust=False, prepost=False, repair=False
+    )
+    if hist.empty:
+        return hist
+    return hist[HISTORY_COLUMNS].fillna({'Volume': 0}).astype(HISTORY_DTYPES)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _get_info(symbol: str) -> dict:
+    """Get the quote summary for the symbol"""
+    return FLOW_CACHE.get_or_fetch(symbol, 'info', lambda: _get_ticker(symbol).info)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_expirations(symbol: str) -> tuple:
+    """Get the listed option expirations; sidebar reruns reuse them in memory"""
+    return FLOW_CACHE.get_or_fetch(
+        symbol, 'options', lambda: _get_ticker(symbol).options, ttl_seconds=OPTIONS_CACHE_TTL
+    )
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_option_chain(symbol: str, expiration: str) -> tuple:
+    """Get the (calls, puts) frames for one expiration"""
+    return FLOW_CACHE.get_or_fetch(
+        symbol, 'option_chain', lambda: tuple(_get_ticker(symbol).option_chain(expiration)[:2]),
+        params={'expiration': expiration}, ttl_seconds=OPTIONS_CACHE_TTL
+    )
+
+# Recommendation per flow setup, in priority order; the first matching setup wins
+RECOMMENDATIONS = [
+    "🚀 FOLLOW THE BIG CALLS - Stock oversold with bullish options flow",
+    "📉 FOLLOW THE BIG PUTS - Stock overbought with bearish options flow",
+    "⚖️ MIXED SIGNALS - Both calls and puts active, wait for direction",
+    "😴 NO UNUSUAL FLOW - Wait for better setup"
+]
+
+def _flow_recommendations(has_calls, has_puts, ath_distance) -> np.ndarray:
+    """Pick the recommendation for each symbol's flow; works on scalars or arrays"""
+    has_calls = np.asarray(has_calls, dtype=bool)
+    has_puts = np.asarray(has_puts, dtype=bool)
+    ath_distance = np.asarray(ath_distance, dtype=np.float64)
+    return np.select(
+        [
+            has_calls & (ath_distance < -10),
+            has_puts & (ath_distance > -5),
+            has_calls & has_puts,
+            ~(has_calls | has_puts)
+        ],
+        RECOMMENDATIONS,
+        default=""
+    )
 
 class OptionsFlowAnalyzer:
     """FL0WG0D-style options flow analyzer"""
@@ -91,79 +196,126 @@ class OptionsFlowAnalyzer:
         self.big_flow_threshold = 1000
         self.unusual_activity_multiplier = 5
         
-    def get_stock_context(self, symbol: str) -> dict:
-        """Get contextual information about the stock"""
+    def get_stock_context_minimal(self, symbol: str) -> dict:
+        """Get the price-derived context the flow logic needs, without the quote summary"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            hist = ticker.history(period="2y")
+            hist = _get_history(symbol, "2y")
             
             if hist.empty:
                 return {}
             
-            current_price = hist['Close'].iloc[-1]
-            all_time_high = hist['High'].max()
-            all_time_low = hist['Low'].min()
-            
-            # Calculate distances from ATH and ATL
-            ath_distance = ((current_price - all_time_high) / all_time_high) * 100
-            atl_distance = ((current_price - all_time_low) / all_time_low) * 100
-            
-            # Recent performance
-            recent_performance = {}
-            periods = {'1M': 30, '3M': 90, '6M': 180, '1Y': 365}
-            
-            for period_name, days in periods.items():
-                if len(hist) >= days:
-                    old_price = hist['Close'].iloc[-days]
-                    performance = ((current_price - old_price) / old_price) * 100
-                    recent_performance[period_name] = performance
-            
-            # Volatility and volume analysis
-            returns = hist['Close'].pct_change().dropna()
-            volatility_30d = returns.tail(30).std() * np.sqrt(252) * 100
-            avg_volume_30d = hist['Volume'].tail(30).mean()
-            current_volume = hist['Volume'].iloc[-1]
-            volume_ratio = current_volume / avg_volume_30d if avg_volume_30d > 0 else 1
-            
-            return {
-                'symbol': symbol,
-                'current_price': current_price,
-                'all_time_high': all_time_high,
-                'all_time_low': all_time_low,
-                'ath_distance_pct': ath_distance,
-                'atl_distance_pct': atl_distance,
-                'recent_performance': recent_performance,
-                'volatility_30d': volatility_30d,
-                'avg_volume_30d': avg_volume_30d,
-                'current_volume': current_volume,
-                'volume_ratio': volume_ratio,
-                'market_cap': info.get('marketCap', 0),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown')
-            }
+            return self._build_context(
+                symbol,
+                hist['Close'].to_numpy(np.float64),
+                hist['Volume'].to_numpy(np.float64),
+                hist['High'].to_numpy(np.float64),
+                hist['Low'].to_numpy(np.float64)
+            )
             
         except Exception as e:
             st.error(f"Error getting stock context: {e}")
             return {}
     
+    def get_stock_context_full(self, symbol: str) -> dict:
+        """Get the price-derived context plus market cap, sector and industry"""
+        context = self.get_stock_context_minimal(symbol)
+        if not context:
+            return {}
+        
+        try:
+            info = _get_info(symbol)
+        except Exception as e:
+            st.error(f"Error getting stock info: {e}")
+            info = {}
+        
+        context.update({
+            'market_cap': info.get('marketCap', 0),
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown')
+        })
+        return context
+    
+    def get_contexts_bulk(self, symbols: list) -> dict:
+        """Get stock context for a watchlist, 20 symbols per Yahoo spark request"""
+        contexts = {}
+        session = _get_session()
+        
+        for start in range(0, len(symbols), SPARK_CHUNK_SIZE):
+            chunk = symbols[start:start + SPARK_CHUNK_SIZE]
+            try:
+                response = session.get(
+                    SPARK_URL,
+                    params={"symbols": ",".join(chunk), "range": "2y", "interval": "1d"},
+                    timeout=15
+                )
+                response.raise_for_status()
+                results = response.json().get('spark', {}).get('result') or []
+            except Exception as e:
+                st.error(f"Error getting bulk stock context: {e}")
+                continue
+            
+            for result in results:
+                symbol = result.get('symbol')
+                try:
+                    quote = result['response'][0]['indicators']['quote'][0]
+                    closes = pd.Series(quote['close'], dtype=np.float64).to_numpy()
+                    valid = ~np.isnan(closes)
+                    if not valid.any():
+                        continue
+                    
+                    # Spark only guarantees closes; fill gaps in the other columns
+                    highs = _spark_column(quote, 'high', closes)
+                    lows = _spark_column(quote, 'low', closes)
+                    volumes = _spark_column(quote, 'volume', np.zeros_like(closes))
+                    
+                    contexts[symbol] = self._build_context(
+                        symbol, closes[valid], volumes[valid], highs[valid], lows[valid]
+                    )
+                except (KeyError, IndexError, TypeError):
+                    continue
+        
+        return contexts
+    
+    def _build_context(self, symbol: str, closes: np.ndarray, volumes: np.ndarray,
+                       highs: np.ndarray, lows: np.ndarray) -> dict:
+        """Assemble the context dict from daily bar arrays"""
+        (current_price, all_time_high, all_time_low, ath_distance, atl_distance,
+         volatility_30d, avg_volume_30d, current_volume, volume_ratio,
+         *performance) = _compute_context_metrics(closes, volumes, highs, lows)
+        recent_performance = {
+            label: perf for label, perf in zip(PERFORMANCE_LABELS, performance) if not np.isnan(perf)
+        }
+        
+        return {
+            'symbol': symbol,
+            'current_price': current_price,
+            'all_time_high': all_time_high,
+            'all_time_low': all_time_low,
+            'ath_distance_pct': ath_distance,
+            'atl_distance_pct': atl_distance,
+            'recent_performance': recent_performance,
+            'volatility_30d': volatility_30d,
+            'avg_volume_30d': avg_volume_30d,
+            'current_volume': current_volume,
+            'volume_ratio': volume_ratio
+        }
+    
     def get_options_chain(self, symbol: str) -> dict:
         """Get options chain data"""
         try:
-            ticker = yf.Ticker(symbol)
-            expirations = ticker.options
+            expirations = _fetch_expirations(symbol)
             
             if not expirations:
                 return {}
             
             # Get options for nearest expiration
             nearest_exp = expirations[0]
-            options_chain = ticker.option_chain(nearest_exp)
+            calls, puts = _fetch_option_chain(symbol, nearest_exp)
             
             return {
                 'expiration': nearest_exp,
-                'calls': options_chain.calls,
-                'puts': options_chain.puts,
+                'calls': calls,
+                'puts': puts,
                 'all_expirations': expirations
             }
             
@@ -174,13 +326,20 @@ class OptionsFlowAnalyzer:
     def analyze_big_flow(self, symbol: str) -> dict:
         """Analyze big options flow with FL0WG0D-style insights"""
         try:
-            # Get stock context
-            context = self.get_stock_context(symbol)
+            # Fetch stock context and options chain concurrently; worker threads
+            # share the script context so st.error still reaches the page
+            ctx = get_script_run_ctx()
+            with ThreadPoolExecutor(
+                max_workers=2,
+                initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+            ) as executor:
+                context_future = executor.submit(self.get_stock_context_minimal, symbol)
+                options_future = executor.submit(self.get_options_chain, symbol)
+                context = context_future.result()
+                options_data = options_future.result()
+            
             if not context:
                 return {"error": "Could not get stock context"}
-            
-            # Get options chain
-            options_data = self.get_options_chain(symbol)
             if not options_data:
                 return {"error": "Could not get options data"}
             
@@ -188,57 +347,18 @@ class OptionsFlowAnalyzer:
             puts = options_data['puts']
             current_price = context['current_price']
             
+            expiration = options_data['expiration']
+            days_to_expiry = self._days_to_expiry(expiration)
+            
             # Analyze big calls (OTM)
-            big_calls = []
+            big_calls = pd.DataFrame()
             if not calls.empty:
-                otm_calls = calls[calls['strike'] > current_price]
-                
-                for _, call in otm_calls.iterrows():
-                    volume = call.get('volume', 0)
-                    open_interest = call.get('openInterest', 0)
-                    last_price = call.get('lastPrice', 0)
-                    strike = call.get('strike', 0)
-                    
-                    if volume >= self.big_flow_threshold or open_interest >= self.big_flow_threshold:
-                        moneyness = ((strike - current_price) / current_price) * 100
-                        potential_return = ((strike - current_price) / last_price) * 100 if last_price > 0 else 0
-                        
-                        big_calls.append({
-                            'strike': strike,
-                            'expiration': options_data['expiration'],
-                            'volume': volume,
-                            'open_interest': open_interest,
-                            'last_price': last_price,
-                            'moneyness_pct': moneyness,
-                            'potential_return_pct': potential_return,
-                            'days_to_expiry': self._days_to_expiry(options_data['expiration'])
-                        })
+                big_calls = self._big_flow_frame(calls, True, current_price, expiration, days_to_expiry)
             
             # Analyze big puts (OTM)
-            big_puts = []
+            big_puts = pd.DataFrame()
             if not puts.empty:
-                otm_puts = puts[puts['strike'] < current_price]
-                
-                for _, put in otm_puts.iterrows():
-                    volume = put.get('volume', 0)
-                    open_interest = put.get('openInterest', 0)
-                    last_price = put.get('lastPrice', 0)
-                    strike = put.get('strike', 0)
-                    
-                    if volume >= self.big_flow_threshold or open_interest >= self.big_flow_threshold:
-                        moneyness = ((current_price - strike) / current_price) * 100
-                        potential_return = ((current_price - strike) / last_price) * 100 if last_price > 0 else 0
-                        
-                        big_puts.append({
-                            'strike': strike,
-                            'expiration': options_data['expiration'],
-                            'volume': volume,
-                            'open_interest': open_interest,
-                            'last_price': last_price,
-                            'moneyness_pct': moneyness,
-                            'potential_return_pct': potential_return,
-                            'days_to_expiry': self._days_to_expiry(options_data['expiration'])
-                        })
+                big_puts = self._big_flow_frame(puts, False, current_price, expiration, days_to_expiry)
             
             # Generate FL0WG0D-style insights
             insights = self._generate_flow_insights(context, big_calls, big_puts)
@@ -256,15 +376,46 @@ class OptionsFlowAnalyzer:
         except Exception as e:
             return {"error": f"Error analyzing options flow: {str(e)}"}
     
-    def _days_to_expiry(self, expiration_date: str) -> int:
-        """Calculate days to expiration"""
+    def _big_flow_frame(self, chain: pd.DataFrame, is_call: bool, current_price: float,
+                        expiration: str, days_to_expiry: int) -> pd.DataFrame:
+        """Select OTM contracts with big volume or open interest from one side of the chain"""
+        volume = chain['volume'].fillna(0).to_numpy(np.int64)
+        open_interest = chain['openInterest'].fillna(0).to_numpy(np.int64)
+        
+        # Illiquid chains: nothing can pass the threshold, skip the OTM arithmetic
+        if volume.max() < self.big_flow_threshold and open_interest.max() < self.big_flow_threshold:
+            return pd.DataFrame(columns=BIG_FLOW_COLUMNS)
+        
+        strike = chain['strike'].to_numpy(np.float64)
+        last_price = chain['lastPrice'].fillna(0.0).to_numpy(np.float64)
+        
+        distance = strike - current_price if is_call else current_price - strike
+        mask = (distance > 0) & ((volume >= self.big_flow_threshold) | (open_interest >= self.big_flow_threshold))
+        
+        distance = distance[mask]
+        last_price = last_price[mask]
+        potential_return = np.divide(distance * 100, last_price, out=np.zeros_like(distance), where=last_price > 0)
+        return pd.DataFrame({
+            'strike': strike[mask],
+            'volume': volume[mask],
+            'open_interest': open_interest[mask],
+            'last_price': last_price,
+            'expiration': expiration,
+            'moneyness_pct': distance / current_price * 100,
+            'potential_return_pct': potential_return,
+            'days_to_expiry': days_to_expiry
+        })
+    
+    def _days_to_expiry(self, expiration_date):
+        """Calculate days to expiration for one date string, or an array for a list of them"""
         try:
-            exp_date = datetime.strptime(expiration_date, '%Y-%m-%d')
-            return (exp_date - datetime.now()).days
-        except:
+            days = np.array(expiration_date, dtype='datetime64[D]') - np.datetime64(datetime.now().date(), 'D')
+            days = days // np.timedelta64(1, 'D')
+            return int(days) if days.ndim == 0 else days
+        except ValueError:
             return 0
     
-    def _generate_flow_insights(self, context: dict, big_calls: list, big_puts: list) -> dict:
+    def _generate_flow_insights(self, context: dict, big_calls: pd.DataFrame, big_puts: pd.DataFrame) -> dict:
         """Generate FL0WG0D-style insights"""
         insights = {
             'market_context': [],
@@ -295,54 +446,58 @@ class OptionsFlowAnalyzer:
             insights['market_context'].append(f"📊 Volume {volume_ratio:.1f}x average - Unusual activity detected")
         
         # Options flow analysis
-        if big_calls:
-            total_call_volume = sum(call['volume'] for call in big_calls)
-            avg_call_moneyness = np.mean([call['moneyness_pct'] for call in big_calls])
+        if not big_calls.empty:
+            total_call_volume = big_calls['volume'].sum()
+            avg_call_moneyness = big_calls['moneyness_pct'].mean()
             
             insights['flow_analysis'].append(f"📞 {len(big_calls)} BIG CALL positions detected")
             insights['flow_analysis'].append(f"💰 Total call volume: {total_call_volume:,} contracts")
             insights['flow_analysis'].append(f"🎯 Average OTM: {avg_call_moneyness:.1f}%")
             
             # Most interesting calls
-            if big_calls:
-                most_otm_call = max(big_calls, key=lambda x: x['moneyness_pct'])
-                insights['flow_analysis'].append(f"🔥 Most OTM call: ${most_otm_call['strike']} ({most_otm_call['moneyness_pct']:.1f}% OTM)")
+            most_otm_call = big_calls.loc[big_calls['moneyness_pct'].idxmax()]
+            insights['flow_analysis'].append(f"🔥 Most OTM call: ${most_otm_call['strike']} ({most_otm_call['moneyness_pct']:.1f}% OTM)")
         
-        if big_puts:
-            total_put_volume = sum(put['volume'] for put in big_puts)
-            avg_put_moneyness = np.mean([put['moneyness_pct'] for put in big_puts])
+        if not big_puts.empty:
+            total_put_volume = big_puts['volume'].sum()
+            avg_put_moneyness = big_puts['moneyness_pct'].mean()
             
             insights['flow_analysis'].append(f"📉 {len(big_puts)} BIG PUT positions detected")
             insights['flow_analysis'].append(f"💰 Total put volume: {total_put_volume:,} contracts")
             insights['flow_analysis'].append(f"🎯 Average OTM: {avg_put_moneyness:.1f}%")
         
         # Contract price analysis
-        if big_calls:
-            for call in big_calls[:3]:  # Show top 3
+        if not big_calls.empty:
+            for call in big_calls.head(3).itertuples(index=False):  # Show top 3
                 insights['contract_analysis'].append(
-                    f"📞 ${call['strike']} call: ${call['last_price']:.2f} "
-                    f"({call['moneyness_pct']:.1f}% OTM, {call['days_to_expiry']}d)"
+                    f"📞 ${call.strike} call: ${call.last_price:.2f} "
+                    f"({call.moneyness_pct:.1f}% OTM, {call.days_to_expiry}d)"
                 )
         
-        if big_puts:
-            for put in big_puts[:3]:  # Show top 3
+        if not big_puts.empty:
+            for put in big_puts.head(3).itertuples(index=False):  # Show top 3
                 insights['contract_analysis'].append(
-                    f"📉 ${put['strike']} put: ${put['last_price']:.2f} "
-                    f"({put['moneyness_pct']:.1f}% OTM, {put['days_to_expiry']}d)"
+                    f"📉 ${put.strike} put: ${put.last_price:.2f} "
+                    f"({put.moneyness_pct:.1f}% OTM, {put.days_to_expiry}d)"
                 )
         
         # FL0WG0D-style recommendations
-        if big_calls and ath_distance < -10:
-            insights['recommendations'].append("🚀 FOLLOW THE BIG CALLS - Stock oversold with bullish options flow")
-        elif big_puts and ath_distance > -5:
-            insights['recommendations'].append("📉 FOLLOW THE BIG PUTS - Stock overbought with bearish options flow")
-        elif big_calls and big_puts:
-            insights['recommendations'].append("⚖️ MIXED SIGNALS - Both calls and puts active, wait for direction")
-        elif not big_calls and not big_puts:
-            insights['recommendations'].append("😴 NO UNUSUAL FLOW - Wait for better setup")
+        recommendation = _flow_recommendations(not big_calls.empty, not big_puts.empty, ath_distance).item()
+        if recommendation:
+            insights['recommendations'].append(recommendation)
         
         return insights
 
+@st.cache_data(ttl=60, show_spinner=False)
+def get_flow_analysis(symbol: str) -> dict:
+    """Run the options flow analysis; repeat clicks within a minute reuse the result"""
+    return OptionsFlowAnalyzer().analyze_big_flow(symbol)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_market_context(symbol: str) -> dict:
+    """Get the full stock context for the Market Context panel, only when it is shown"""
+    return OptionsFlowAnalyzer().get_stock_context_full(symbol)
+
 class GrokAnalyzer:
     """Grok AI-powered analysis"""
     
@@ -352,58 +507,71 @@ class GrokAnalyzer:
         self.model = "grok-3"
         self.max_tokens = 1000
         self.temperature = 0.7
+        
+        # Keep-alive session so repeated analyses reuse the TLS connection
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"})
+            )
+        ))
     
     def is_available(self):
         return bool(self.api_key)
     
+    def _build_request(self, flow_data):
+        """Build the chat completion payload for the options flow prompt"""
+        prompt = f"""
+        Analyze this options flow data and provide FL0WG0D-style insights:
+        
+        Symbol: {flow_data.get('symbol', 'Unknown')}
+        Current Price: ${flow_data.get('current_price', 0):.2f}
+        ATH Distance: {flow_data.get('context', {}).get('ath_distance_pct', 0):.1f}%
+        Big Calls: {len(flow_data.get('big_calls', []))}
+        Big Puts: {len(flow_data.get('big_puts', []))}
+        
+        Provide:
+        1. FL0WG0D-style analysis of the flow
+        2. Whether to follow the big calls or puts
+        3. Risk assessment for OTM plays
+        4. Price targets based on options flow
+        5. Time horizon for the play
+        """
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are FL0WG0D, an expert options flow analyst. Provide sharp, actionable insights about big calls and puts with specific recommendations."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
+    
     def analyze_options_flow(self, flow_data):
         """Generate AI analysis for options flow"""
         if not self.is_available():
             return {"error": "Grok API key not available"}
         
         try:
-            prompt = f"""
-            Analyze this options flow data and provide FL0WG0D-style insights:
-            
-            Symbol: {flow_data.get('symbol', 'Unknown')}
-            Current Price: ${flow_data.get('current_price', 0):.2f}
-            ATH Distance: {flow_data.get('context', {}).get('ath_distance_pct', 0):.1f}%
-            Big Calls: {len(flow_data.get('big_calls', []))}
-            Big Puts: {len(flow_data.get('big_puts', []))}
-            
-            Provide:
-            1. FL0WG0D-style analysis of the flow
-            2. Whether to follow the big calls or puts
-            3. Risk assessment for OTM plays
-            4. Price targets based on options flow
-            5. Time horizon for the play
-            """
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are FL0WG0D, an expert options flow analyst. Provide sharp, actionable insights about big calls and puts with specific recommendations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": self.max_tokens,
-                "temperature": self.temperature
-            }
-            
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=data,
+                json=self._build_request(flow_data),
                 timeout=30
             )
             
@@ -419,6 +587,50 @@ class GrokAnalyzer:
                 
         except Exception as e:
             return {"error": f"Error calling Grok API: {str(e)}"}
+    
+    def stream_options_flow(self, flow_data):
+        """Yield the options flow analysis text as Grok generates it"""
+        data = self._build_request(flow_data)
+        data["stream"] = True
+        
+        with self._session.post(
+            f"{self.base_url}/chat/completions",
+            json=data,
+            stream=True,
+            timeout=30
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Grok API error: {response.status_code}")
+            
+            # Server-sent events: one "data: {json}" frame per token batch
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get('choices') or [{}]
+                content = choices[0].get('delta', {}).get('content')
+                if content:
+                    yield content
+
+@st.cache_resource
+def get_grok_analyzer() -> GrokAnalyzer:
+    """Get the Grok analyzer, keeping its HTTP session alive across reruns"""
+    return GrokAnalyzer()
+
+def _flow_cards_html(contracts: pd.DataFrame, css_class: str, label: str) -> str:
+    """Render all big contracts of one side as a single HTML block"""
+    return "".join(
+        f'<div class="{css_class}">'
+        f"<strong>${c.strike} {label}</strong><br>"
+        f"Volume: {c.volume:,} | OI: {c.open_interest:,}<br>"
+        f"Price: ${c.last_price:.2f} | {c.moneyness_pct:.1f}% OTM<br>"
+        f"Expiry: {c.days_to_expiry} days"
+        "</div>"
+        for c in contracts.itertuples(index=False)
+    )
 
 def display_options_flow_analysis(flow_data):
     """Display options flow analysis in FL0WG0D style"""
@@ -443,61 +655,41 @@ def display_options_flow_analysis(flow_data):
     
     # Market context
     st.subheader("📊 Market Context")
-    for insight in insights['market_context']:
-        st.info(insight)
+    if insights['market_context']:
+        st.info("\n\n".join(insights['market_context']))
     
     # Flow analysis
     st.subheader("💰 Options Flow Analysis")
-    for insight in insights['flow_analysis']:
-        st.success(insight)
+    if insights['flow_analysis']:
+        st.success("\n\n".join(insights['flow_analysis']))
     
     # Contract analysis
     st.subheader("📋 Contract Analysis")
-    for insight in insights['contract_analysis']:
-        st.info(insight)
+    if insights['contract_analysis']:
+        st.info("\n\n".join(insights['contract_analysis']))
     
     # Big calls display
-    if big_calls:
+    if not big_calls.empty:
         st.subheader("📞 BIG CALLS DETECTED")
-        for call in big_calls:
-            st.markdown(f"""
-            <div class="big-call">
-                <strong>${call['strike']} CALL</strong><br>
-                Volume: {call['volume']:,} | OI: {call['open_interest']:,}<br>
-                Price: ${call['last_price']:.2f} | {call['moneyness_pct']:.1f}% OTM<br>
-                Expiry: {call['days_to_expiry']} days
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(_flow_cards_html(big_calls, 'big-call', 'CALL'), unsafe_allow_html=True)
     
     # Big puts display
-    if big_puts:
+    if not big_puts.empty:
         st.subheader("📉 BIG PUTS DETECTED")
-        for put in big_puts:
-            st.markdown(f"""
-            <div class="big-put">
-                <strong>${put['strike']} PUT</strong><br>
-                Volume: {put['volume']:,} | OI: {put['open_interest']:,}<br>
-                Price: ${put['last_price']:.2f} | {put['moneyness_pct']:.1f}% OTM<br>
-                Expiry: {put['days_to_expiry']} days
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(_flow_cards_html(big_puts, 'big-put', 'PUT'), unsafe_allow_html=True)
     
     # Recommendations
     st.subheader("🎯 FL0WG0D RECOMMENDATIONS")
-    for rec in insights['recommendations']:
-        st.warning(rec)
+    if insights['recommendations']:
+        st.warning("\n\n".join(insights['recommendations']))
 
 def main():
     """Main application function"""
     
+    _inject_css()
+    
     # Header with CROC branding
-    st.markdown("""
-    <div class="croc-branding">
-        <h1>🐊 CROC INVESTMENT FUND</h1>
-        <h2>FL0WG0D OPTIONS FLOW ANALYSIS 🚀</h2>
-        <h3>Big Calls & Puts Detection with AI Insights</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    _render_header()
     
     # Sidebar
     st.sidebar.header("🔧 Analysis Settings")
@@ -518,7 +710,7 @@ def main():
     # API Status
     st.sidebar.subheader("🔑 API Status")
     
-    grok_analyzer = GrokAnalyzer()
+    grok_analyzer = get_grok_analyzer()
     if grok_analyzer.is_available():
         st.sidebar.success("🟢 Grok AI Available")
     else:
@@ -533,11 +725,8 @@ def main():
             return
         
         with st.spinner(f"Analyzing {symbol} options flow... This may take a few seconds."):
-            # Initialize options flow analyzer
-            flow_analyzer = OptionsFlowAnalyzer()
-            
             # Get options flow analysis
-            flow_data = flow_analyzer.analyze_big_flow(symbol)
+            flow_data = get_flow_analysis(symbol)
             
             if 'error' not in flow_data:
                 st.success(f"✅ Options flow analysis complete for {symbol}!")
@@ -548,23 +737,17 @@ def main():
                 
                 # AI Analysis
                 if show_ai_analysis and grok_analyzer.is_available():
-                    with st.spinner("🤖 Grok AI analyzing options flow..."):
-                        ai_result = grok_analyzer.analyze_options_flow(flow_data)
-                        
-                        if 'error' not in ai_result:
-                            st.subheader("🤖 AI Analysis (FL0WG0D Style)")
-                            st.markdown(f"""
-                            <div class="ai-analysis">
-                                {ai_result['analysis']}
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.error(f"AI Analysis Error: {ai_result['error']}")
+                    st.subheader("🤖 AI Analysis (FL0WG0D Style)")
+                    try:
+                        with st.container(border=True):
+                            st.write_stream(grok_analyzer.stream_options_flow(flow_data))
+                    except Exception as e:
+                        st.error(f"AI Analysis Error: {e}")
                 
                 # Market context
                 if show_context:
                     st.subheader("📈 Market Context")
-                    context = flow_data['context']
+                    context = get_market_context(symbol) or flow_data['context']
                     
                     col1, col2, col3, col4 = st.columns(4)
                     
@@ -573,12 +756,12 @@ def main():
                         st.metric("ATH Distance", f"{context['ath_distance_pct']:.1f}%")
                     
                     with col2:
-                        st.metric("Market Cap", f"${context['market_cap']:,.0f}")
+                        st.metric("Market Cap", f"${context.get('market_cap', 0):,.0f}")
                         st.metric("Volume Ratio", f"{context['volume_ratio']:.1f}x")
                     
                     with col3:
                         st.metric("Volatility (30d)", f"{context['volatility_30d']:.1f}%")
-                        st.metric("Sector", context['sector'])
+                        st.metric("Sector", context.get('sector', 'Unknown'))
                     
                     with col4:
                         recent_perf = context['recent_performance']
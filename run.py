@@ -9,10 +9,11 @@ import argparse
 import json
 from datetime import datetime
 
-# Add src directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
-from src.stock_analyzer import StockAnalyzer
+# orjson is optional; it serializes numpy values natively and much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 def main():
     """Command line interface for stock analysis"""
@@ -67,6 +68,9 @@ Examples:
     
     args = parser.parse_args()
     
+    # Imported here so --help and argument errors skip loading the analysis stack
+    from src.stock_analyzer import StockAnalyzer
+    
     # Initialize analyzer
     print(f"🔍 Analyzing {args.symbol.upper()}...")
     analyzer = StockAnalyzer()
@@ -176,6 +180,35 @@ def display_results(results, verbose=False):
 def save_results(results, filename):
     """Save results to JSON file"""
     
+    metadata = {
+        'tool_version': '1.0.0',
+        'export_date': datetime.now().isoformat(),
+        'export_format': 'json'
+    }
+    
+    if orjson is not None:
+        payload = orjson.dumps(
+            {**results, 'metadata': metadata},
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        )
+    else:
+        payload = _legacy_json_bytes(results, metadata)
+    
+    # Write to a temp file and swap it in, so an interrupted save never leaves partial JSON
+    tmp_filename = f"{filename}.tmp"
+    try:
+        with open(tmp_filename, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+def _legacy_json_bytes(results, metadata):
+    """Encode results with the standard json module when orjson is unavailable"""
+    
     # Convert numpy types to native Python types for JSON serialization
     def convert_types(obj):
         if isinstance(obj, dict):
@@ -193,15 +226,9 @@ def save_results(results, filename):
     json_results = convert_types(results)
     
     # Add metadata
-    json_results['metadata'] = {
-        'tool_version': '1.0.0',
-        'export_date': datetime.now().isoformat(),
-        'export_format': 'json'
-    }
+    json_results['metadata'] = metadata
     
-    # Save to file
-    with open(filename, 'w') as f:
-        json.dump(json_results, f, indent=2, default=str)
+    return json.dumps(json_results, indent=2, default=str).encode('utf-8')
 
 if __name__ == "__main__":
     main()
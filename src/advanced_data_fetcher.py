@@ -5,74 +5,208 @@ Includes analyst ratings, options flow, institutional data, and more
 
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import re
+import os
 from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime, timedelta
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.cache import FileCache
 
 logger = logging.getLogger(__name__)
 
+# Analyst grade to consensus score
+RATING_SCORES = pd.Series({
+    'Strong Buy': 5, 'Buy': 4, 'Hold': 3,
+    'Underperform': 2, 'Sell': 1, 'Strong Sell': 0
+})
+
+# Consensus score buckets: a score at or above each threshold moves up one label
+RATING_THRESHOLDS = np.array([1.5, 2.5, 3.5, 4.5])
+RATING_LABELS = ('Sell', 'Underperform', 'Hold', 'Buy', 'Strong Buy')
+
+def _df_columnar(df: pd.DataFrame) -> Dict[str, list]:
+    """Column-oriented dict of a DataFrame, one list per column"""
+    return {column: df[column].tolist() for column in df.columns}
+
+# Numba is optional; without it the technical kernel runs as plain Python/NumPy
+try:
+    from numba import njit, types
+    # pandas hands back read-only views of float64 columns; 'A' layout takes strided ones too
+    _BARS = types.Array(types.float64, 1, 'A', readonly=True)
+    _KERNEL_SIGNATURE = types.UniTuple(types.float64, 10)(_BARS, _BARS, _BARS, _BARS)
+except ImportError:
+    _KERNEL_SIGNATURE = None
+    
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+# Eager signature compiles at import (or loads the on-disk cache) instead of on the
+# first call; fastmath excludes the no-NaN/no-inf flags because short histories yield NaN
+@njit(
+    _KERNEL_SIGNATURE,
+    cache=True,
+    nogil=True,
+    error_model="numpy",
+    fastmath={"reassoc", "contract", "arcp", "nsz"}
+)
+def _technical_kernel(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray) -> tuple:
+    """Latest MACD, stochastic, Williams %R, ATR and volume values in one pass over the bars"""
+    n = close.shape[0]
+    
+    # MACD from adjusted EMAs, matching pandas ewm(span=...).mean()
+    decay_12, decay_26, decay_9 = 1 - 2 / 13, 1 - 2 / 27, 1 - 2 / 10
+    num_12 = den_12 = num_26 = den_26 = num_9 = den_9 = 0.0
+    macd = macd_signal = np.nan
+    for i in range(n):
+        num_12 = close[i] + decay_12 * num_12
+        den_12 = 1.0 + decay_12 * den_12
+        num_26 = close[i] + decay_26 * num_26
+        den_26 = 1.0 + decay_26 * den_26
+        macd = num_12 / den_12 - num_26 / den_26
+        num_9 = macd + decay_9 * num_9
+        den_9 = 1.0 + decay_9 * den_9
+        macd_signal = num_9 / den_9
+    
+    # Stochastic %K for the last three bars (their mean is %D) and Williams %R
+    k_percent = np.full(3, np.nan)
+    lowest_low = highest_high = np.nan
+    for j in range(3):
+        end = n - j
+        if end >= 14:
+            window_low = low[end - 14:end].min()
+            window_high = high[end - 14:end].max()
+            k_percent[j] = 100 * (close[end - 1] - window_low) / (window_high - window_low)
+            if j == 0:
+                lowest_low, highest_high = window_low, window_high
+    williams_r = -100 * (highest_high - close[n - 1]) / (highest_high - lowest_low)
+    
+    # Average True Range over the last 14 bars
+    atr = np.nan
+    if n >= 14:
+        window_high = high[n - 14:]
+        window_low = low[n - 14:]
+        prev_close = np.empty(14)
+        prev_close[1:] = close[n - 14:n - 1]
+        # The first bar of a 14-bar history has no prior close; any value inside
+        # its range leaves the true range at high - low
+        prev_close[0] = close[n - 15] if n > 14 else window_low[0]
+        true_range = np.maximum(
+            np.maximum(window_high - window_low, np.abs(window_high - prev_close)),
+            np.abs(window_low - prev_close)
+        )
+        atr = true_range.mean()
+    
+    # Volume vs its 20-day average
+    avg_volume_20d = volume[n - 20:].mean() if n >= 20 else np.nan
+    current_volume = volume[n - 1]
+    volume_ratio = current_volume / avg_volume_20d if avg_volume_20d > 0 else 1.0
+    
+    return (macd, macd_signal, macd - macd_signal, k_percent[0], k_percent.mean(), williams_r,
+            atr, volume_ratio, current_volume, avg_volume_20d)
+
 class AdvancedDataFetcher:
     """Enhanced data fetcher with advanced market data"""
     
+    # On-disk cache lifetime per yfinance endpoint, in seconds
+    CACHE_TTLS = {
+        'options': 600,
+        'option_chain': 600,
+        'news': 600,
+        'history': 300,
+        'recommendations': 3600,
+        'info': 3600,
+        'institutional_holders': 86400,
+        'major_holders': 86400
+    }
+    
+    # News sentiment keywords, one alternation per polarity
+    _POSITIVE_RE = re.compile('beat|exceed|growth|strong|positive|bullish|upgrade')
+    _NEGATIVE_RE = re.compile('miss|decline|weak|negative|bearish|downgrade|cut')
+    
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Pool sized for the parallel fetches, all sharing keep-alive connections
+        self.session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=16))
         
         # API endpoints for additional data
         self.alpha_vantage_key = None  # Add your Alpha Vantage key
         self.polygon_key = None  # Add your Polygon.io key
         self.quandl_key = None  # Add your Quandl key
+        
+        # Ticker objects reused across methods, keyed by symbol
+        self._ticker_cache = {}
+        self._institutional_cache = {}
+        self._cache = FileCache(cache_dir=os.path.join(".cache", "advanced_data"))
+    
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        """Get the cached Ticker for a symbol, creating it on first use"""
+        ticker = self._ticker_cache.get(symbol)
+        if ticker is None:
+            # setdefault keeps a single Ticker when parallel fetches race here
+            ticker = self._ticker_cache.setdefault(symbol, yf.Ticker(symbol, session=self.session))
+        return ticker
+    
+    def _cached(self, endpoint: str, symbol: str, fetch, params: Optional[Dict] = None):
+        """Read a yfinance response through the on-disk cache with the endpoint's TTL"""
+        return self._cache.get_or_fetch(
+            symbol, endpoint, fetch, params=params, ttl_seconds=self.CACHE_TTLS[endpoint]
+        )
+    
+    def _history(self, symbol: str, period: str = "1y") -> pd.DataFrame:
+        """Get price history through the on-disk cache, keyed by symbol and period"""
+        return self._cached(
+            'history', symbol, lambda: self._ticker(symbol).history(period=period), params={'period': period}
+        )
     
     def get_comprehensive_analyst_data(self, symbol: str) -> Dict:
         """Get comprehensive analyst ratings and price targets"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             
             # Get analyst recommendations
-            recommendations = ticker.recommendations
+            recommendations = self._cached('recommendations', symbol, lambda: ticker.recommendations)
             analyst_data = {}
             
             if recommendations is not None and not recommendations.empty:
                 # Get latest recommendations
-                latest_recs = recommendations.tail(10)
+                latest_recs = recommendations.iloc[-10:]
+                grades = latest_recs['To Grade']
                 
                 # Calculate consensus
-                rating_counts = latest_recs['To Grade'].value_counts()
+                rating_counts = {grade: int(count) for grade, count in grades.value_counts().items()}
                 total_ratings = len(latest_recs)
                 
-                # Map ratings to scores
-                rating_scores = {
-                    'Strong Buy': 5, 'Buy': 4, 'Hold': 3, 
-                    'Underperform': 2, 'Sell': 1, 'Strong Sell': 0
-                }
-                
-                consensus_score = 0
-                for rating, count in rating_counts.items():
-                    if rating in rating_scores:
-                        consensus_score += rating_scores[rating] * count
-                
-                consensus_score = consensus_score / total_ratings if total_ratings > 0 else 3
+                # Map ratings to scores; unknown grades score 0 but still count
+                rating_scores = grades.map(RATING_SCORES)
+                consensus_score = rating_scores.sum() / total_ratings if total_ratings > 0 else 3
                 
                 # Get price targets
-                price_targets = latest_recs['Target'].dropna()
-                avg_target = price_targets.mean() if not price_targets.empty else 0
-                high_target = price_targets.max() if not price_targets.empty else 0
-                low_target = price_targets.min() if not price_targets.empty else 0
+                price_targets = latest_recs['Target'].to_numpy(dtype=np.float64)
+                price_targets = price_targets[~np.isnan(price_targets)]
+                if price_targets.size:
+                    avg_target, high_target, low_target = price_targets.mean(), price_targets.max(), price_targets.min()
+                else:
+                    avg_target = high_target = low_target = 0
                 
                 analyst_data = {
                     'consensus_rating': self._score_to_rating(consensus_score),
                     'consensus_score': consensus_score,
                     'total_analysts': total_ratings,
-                    'rating_distribution': rating_counts.to_dict(),
+                    'rating_distribution': rating_counts,
                     'average_price_target': avg_target,
                     'high_price_target': high_target,
                     'low_price_target': low_target,
-                    'latest_recommendations': latest_recs.to_dict('records')
+                    'latest_recommendations': _df_columnar(latest_recs)
                 }
             
             # Get institutional holdings
@@ -88,21 +222,20 @@ class AdvancedDataFetcher:
     def get_options_flow_data(self, symbol: str) -> Dict:
         """Get options flow and unusual activity data"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             
             # Get options data
             options_data = {}
             
             # Get expiration dates
-            expirations = ticker.options
+            expirations = self._cached('options', symbol, lambda: ticker.options)
             if expirations:
                 # Get nearest expiration
                 nearest_exp = expirations[0]
-                options_chain = ticker.option_chain(nearest_exp)
-                
-                # Analyze calls and puts
-                calls = options_chain.calls
-                puts = options_chain.puts
+                calls, puts = self._cached(
+                    'option_chain', symbol, lambda: tuple(ticker.option_chain(nearest_exp)[:2]),
+                    params={'expiration': nearest_exp}
+                )
                 
                 # Calculate put/call ratio
                 total_call_volume = calls['volume'].sum() if 'volume' in calls.columns else 0
@@ -110,23 +243,15 @@ class AdvancedDataFetcher:
                 put_call_ratio = total_put_volume / total_call_volume if total_call_volume > 0 else 0
                 
                 # Find unusual activity (high volume, low open interest)
-                if not calls.empty:
-                    unusual_calls = calls[
-                        (calls['volume'] > calls['openInterest'] * 2) & 
-                        (calls['volume'] > 100)
-                    ]
-                    
-                    unusual_puts = puts[
-                        (puts['volume'] > puts['openInterest'] * 2) & 
-                        (puts['volume'] > 100)
-                    ]
+                unusual_calls_count = self._count_unusual(calls)
+                unusual_puts_count = self._count_unusual(puts)
                 
                 options_data = {
                     'put_call_ratio': put_call_ratio,
                     'total_call_volume': total_call_volume,
                     'total_put_volume': total_put_volume,
-                    'unusual_calls_count': len(unusual_calls) if 'unusual_calls' in locals() else 0,
-                    'unusual_puts_count': len(unusual_puts) if 'unusual_puts' in locals() else 0,
+                    'unusual_calls_count': unusual_calls_count,
+                    'unusual_puts_count': unusual_puts_count,
                     'nearest_expiration': nearest_exp,
                     'options_available': len(expirations) > 0
                 }
@@ -137,35 +262,26 @@ class AdvancedDataFetcher:
             logger.error(f"Error fetching options data for {symbol}: {e}")
             return {}
     
+    def _count_unusual(self, chain: pd.DataFrame) -> int:
+        """Count contracts trading over 100 lots and more than twice their open interest"""
+        if chain.empty or 'volume' not in chain.columns:
+            return 0
+        volume = chain['volume'].to_numpy(np.float64)
+        open_interest = chain['openInterest'].to_numpy(np.float64)
+        return int(np.count_nonzero((volume > 100) & (volume > open_interest * 2)))
+    
     def get_insider_trading_data(self, symbol: str) -> Dict:
         """Get insider trading and institutional activity"""
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Get insider transactions
-            insider_data = {}
+            ticker = self._ticker(symbol)
             
             # Get institutional holders
-            institutional_holders = ticker.institutional_holders
-            if institutional_holders is not None and not institutional_holders.empty:
-                # Calculate institutional ownership percentage
-                total_shares = institutional_holders['Shares'].sum()
-                institutional_ownership = (total_shares / ticker.info.get('sharesOutstanding', 1)) * 100
-                
-                # Get top holders
-                top_holders = institutional_holders.head(5)
-                
-                insider_data = {
-                    'institutional_ownership_pct': institutional_ownership,
-                    'total_institutional_shares': total_shares,
-                    'top_institutional_holders': top_holders.to_dict('records'),
-                    'number_of_institutions': len(institutional_holders)
-                }
+            insider_data = dict(self._institutional_snapshot(symbol))
             
             # Get major holders
-            major_holders = ticker.major_holders
+            major_holders = self._cached('major_holders', symbol, lambda: ticker.major_holders)
             if major_holders is not None and not major_holders.empty:
-                insider_data['major_holders'] = major_holders.to_dict('records')
+                insider_data['major_holders'] = _df_columnar(major_holders)
             
             return insider_data
             
@@ -176,32 +292,20 @@ class AdvancedDataFetcher:
     def get_news_sentiment_data(self, symbol: str) -> Dict:
         """Get news sentiment and social media buzz"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             
             # Get news
-            news = ticker.news
+            news = self._cached('news', symbol, lambda: ticker.news)
             sentiment_data = {}
             
             if news:
-                # Analyze news sentiment (simplified)
-                positive_keywords = ['beat', 'exceed', 'growth', 'strong', 'positive', 'bullish', 'upgrade']
-                negative_keywords = ['miss', 'decline', 'weak', 'negative', 'bearish', 'downgrade', 'cut']
-                
-                positive_count = 0
-                negative_count = 0
+                # Analyze news sentiment (simplified) over the last 10 articles as one corpus
+                texts = [f"{article.get('title', '')} {article.get('summary', '')}".lower() for article in news[:10]]
+                corpus = '\n'.join(texts)
+                article_starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
                 
-                for article in news[:10]:  # Analyze last 10 articles
-                    title = article.get('title', '').lower()
-                    summary = article.get('summary', '').lower()
-                    text = title + ' ' + summary
-                    
-                    for keyword in positive_keywords:
-                        if keyword in text:
-                            positive_count += 1
-                    
-                    for keyword in negative_keywords:
-                        if keyword in text:
-                            negative_count += 1
+                positive_count = self._count_keywords(self._POSITIVE_RE, corpus, article_starts)
+                negative_count = self._count_keywords(self._NEGATIVE_RE, corpus, article_starts)
                 
                 total_articles = len(news[:10])
                 sentiment_score = (positive_count - negative_count) / total_articles if total_articles > 0 else 0
@@ -220,59 +324,41 @@ class AdvancedDataFetcher:
             logger.error(f"Error fetching news sentiment for {symbol}: {e}")
             return {}
     
+    def _count_keywords(self, pattern: re.Pattern, corpus: str, article_starts: np.ndarray) -> int:
+        """Count keyword hits in one scan of the corpus, each keyword once per article"""
+        matches = [(match.start(), match.group()) for match in pattern.finditer(corpus)]
+        if not matches:
+            return 0
+        articles = np.searchsorted(article_starts, [start for start, _ in matches], side='right')
+        return len(set(zip(articles.tolist(), (keyword for _, keyword in matches))))
+    
     def get_advanced_technical_indicators(self, symbol: str) -> Dict:
         """Get advanced technical indicators"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1y")
+            hist = self._history(symbol, "1y")
             
             if hist.empty:
                 return {}
             
-            # Calculate advanced indicators
-            close = hist['Close']
-            high = hist['High']
-            low = hist['Low']
-            volume = hist['Volume']
-            
-            # MACD
-            exp1 = close.ewm(span=12).mean()
-            exp2 = close.ewm(span=26).mean()
-            macd = exp1 - exp2
-            macd_signal = macd.ewm(span=9).mean()
-            macd_histogram = macd - macd_signal
-            
-            # Stochastic Oscillator
-            lowest_low = low.rolling(window=14).min()
-            highest_high = high.rolling(window=14).max()
-            k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-            d_percent = k_percent.rolling(window=3).mean()
-            
-            # Williams %R
-            williams_r = -100 * ((highest_high - close) / (highest_high - lowest_low))
-            
-            # Average True Range (ATR)
-            tr1 = high - low
-            tr2 = abs(high - close.shift())
-            tr3 = abs(low - close.shift())
-            true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr = true_range.rolling(window=14).mean()
-            
-            # Volume indicators
-            volume_sma = volume.rolling(window=20).mean()
-            volume_ratio = volume.iloc[-1] / volume_sma.iloc[-1] if volume_sma.iloc[-1] > 0 else 1
+            (macd, macd_signal, macd_histogram, stochastic_k, stochastic_d, williams_r,
+             atr, volume_ratio, current_volume, avg_volume_20d) = _technical_kernel(
+                hist['Close'].to_numpy(np.float64),
+                hist['High'].to_numpy(np.float64),
+                hist['Low'].to_numpy(np.float64),
+                hist['Volume'].to_numpy(np.float64)
+            )
             
             return {
-                'macd': macd.iloc[-1],
-                'macd_signal': macd_signal.iloc[-1],
-                'macd_histogram': macd_histogram.iloc[-1],
-                'stochastic_k': k_percent.iloc[-1],
-                'stochastic_d': d_percent.iloc[-1],
-                'williams_r': williams_r.iloc[-1],
-                'atr': atr.iloc[-1],
+                'macd': macd,
+                'macd_signal': macd_signal,
+                'macd_histogram': macd_histogram,
+                'stochastic_k': stochastic_k,
+                'stochastic_d': stochastic_d,
+                'williams_r': williams_r,
+                'atr': atr,
                 'volume_ratio': volume_ratio,
-                'current_volume': volume.iloc[-1],
-                'avg_volume_20d': volume_sma.iloc[-1]
+                'current_volume': current_volume,
+                'avg_volume_20d': avg_volume_20d
             }
             
         except Exception as e:
@@ -281,62 +367,71 @@ class AdvancedDataFetcher:
     
     def _get_institutional_holdings(self, symbol: str) -> Dict:
         """Get institutional holdings data"""
+        return dict(self._institutional_snapshot(symbol))
+    
+    def _institutional_snapshot(self, symbol: str) -> Dict:
+        """Institutional ownership summary, computed once per symbol and shared by callers"""
+        snapshot = self._institutional_cache.get(symbol)
+        if snapshot is not None:
+            return snapshot
+        
         try:
-            ticker = yf.Ticker(symbol)
-            institutional_holders = ticker.institutional_holders
+            ticker = self._ticker(symbol)
+            institutional_holders = self._cached('institutional_holders', symbol, lambda: ticker.institutional_holders)
             
             if institutional_holders is None or institutional_holders.empty:
-                return {}
-            
-            # Calculate institutional ownership
-            total_shares = institutional_holders['Shares'].sum()
-            shares_outstanding = ticker.info.get('sharesOutstanding', 1)
-            institutional_ownership_pct = (total_shares / shares_outstanding) * 100
-            
-            return {
-                'institutional_ownership_pct': institutional_ownership_pct,
-                'total_institutional_shares': total_shares,
-                'number_of_institutions': len(institutional_holders),
-                'top_institutional_holders': institutional_holders.head(5).to_dict('records')
-            }
+                snapshot = {}
+            else:
+                # Calculate institutional ownership
+                info = self._cached('info', symbol, lambda: ticker.info)
+                total_shares = institutional_holders['Shares'].sum()
+                shares_outstanding = info.get('sharesOutstanding', 1)
+                
+                snapshot = {
+                    'institutional_ownership_pct': (total_shares / shares_outstanding) * 100,
+                    'total_institutional_shares': total_shares,
+                    'number_of_institutions': len(institutional_holders),
+                    'top_institutional_holders': _df_columnar(institutional_holders.head(5))
+                }
             
         except Exception as e:
             logger.error(f"Error fetching institutional holdings for {symbol}: {e}")
             return {}
+        
+        return self._institutional_cache.setdefault(symbol, snapshot)
     
     def _score_to_rating(self, score: float) -> str:
         """Convert numerical score to rating"""
-        if score >= 4.5:
-            return "Strong Buy"
-        elif score >= 3.5:
-            return "Buy"
-        elif score >= 2.5:
-            return "Hold"
-        elif score >= 1.5:
-            return "Underperform"
-        else:
-            return "Sell"
+        return RATING_LABELS[int(np.searchsorted(RATING_THRESHOLDS, score, side='right'))]
     
     def get_comprehensive_market_data(self, symbol: str) -> Dict:
         """Get all comprehensive market data"""
         try:
             logger.info(f"Fetching comprehensive market data for {symbol}")
             
-            # Fetch all data types
-            analyst_data = self.get_comprehensive_analyst_data(symbol)
-            options_data = self.get_options_flow_data(symbol)
-            insider_data = self.get_insider_trading_data(symbol)
-            sentiment_data = self.get_news_sentiment_data(symbol)
-            technical_data = self.get_advanced_technical_indicators(symbol)
+            # Cheap probe first: an unknown symbol has no last price, so skip the five fetches
+            try:
+                last_price = self._ticker(symbol).fast_info.get('lastPrice')
+            except Exception:
+                last_price = None
+            if last_price is None or not last_price > 0:
+                logger.warning(f"No market price for {symbol}; skipping comprehensive fetch")
+                return {}
             
-            return {
-                'analyst_data': analyst_data,
-                'options_data': options_data,
-                'insider_data': insider_data,
-                'sentiment_data': sentiment_data,
-                'advanced_technical': technical_data,
-                'data_fetch_time': datetime.now().isoformat()
+            # Fetch all data types concurrently; each one is network-bound
+            fetchers = {
+                'analyst_data': self.get_comprehensive_analyst_data,
+                'options_data': self.get_options_flow_data,
+                'insider_data': self.get_insider_trading_data,
+                'sentiment_data': self.get_news_sentiment_data,
+                'advanced_technical': self.get_advanced_technical_indicators
             }
+            with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+                futures = {key: executor.submit(fetch, symbol) for key, fetch in fetchers.items()}
+                market_data = {key: future.result() for key, future in futures.items()}
+            
+            market_data['data_fetch_time'] = datetime.now().isoformat()
+            return market_data
             
         except Exception as e:
             logger.error(f"Error fetching comprehensive market data for {symbol}: {e}")
@@ -2,27 +2,176 @@
 AI-Powered Stock Analysis using OpenAI GPT
 """
 
+import asyncio
+import hashlib
 import openai
+import httpx
+import ssl
 import json
-from typing import Dict, List, Optional
+import string
+import textwrap
+from typing import Dict, Iterator, List, Optional
 import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import OPENAI_API_KEY, DEFAULT_MODEL, MAX_TOKENS, TEMPERATURE
+from tools.cache import FileCache
 
 logger = logging.getLogger(__name__)
 
+# Identical prompts within this window reuse the stored completion
+PROMPT_CACHE_TTL = 6 * 3600
+
+# Prompt bodies, compiled once; values are pre-formatted by the _create_*_prompt methods
+_ANALYSIS_TEMPLATE = string.Template(textwrap.dedent("""
+    Analyze $symbol ($name) and provide a comprehensive investment analysis.
+    
+    COMPANY OVERVIEW:
+    - Current Price: $$$current_price
+    - Market Cap: $$$market_cap
+    - Sector: $sector
+    - Industry: $industry
+    
+    FINANCIAL METRICS:
+    - P/E Ratio: $pe_ratio
+    - P/B Ratio: $price_to_book
+    - ROE: $return_on_equity
+    - ROA: $return_on_assets
+    - Debt/Equity: $debt_to_equity
+    - Profit Margin: $profit_margin
+    - Revenue Growth: $revenue_growth
+    - Earnings Growth: $earnings_growth
+    
+    VALUATION:
+    - Fair Value: $$$fair_value
+    - Upside/Downside: $upside_potential%
+    
+    TECHNICAL ANALYSIS:
+    - RSI: $rsi
+    - Volatility: $volatility
+    - Price vs 200-day MA: $vs_ma_200%
+    
+    RECOMMENDATION: $recommendation (Score: $score)
+    
+    Please provide:
+    1. Executive Summary
+    2. Strengths and Opportunities
+    3. Weaknesses and Threats
+    4. Valuation Analysis
+    5. Technical Outlook
+    6. Investment Recommendation with Rationale
+    7. Key Risks and Mitigation
+    8. Price Targets and Time Horizon
+    
+    Format as a professional investment research report.
+    """))
+
+_THESIS_TEMPLATE = string.Template(textwrap.dedent("""
+    Generate a comprehensive investment thesis for $symbol ($name).
+    
+    Key Data:
+    - Current Price: $$$current_price
+    - Market Cap: $$$market_cap
+    - Sector: $sector
+    - P/E Ratio: $pe_ratio
+    - ROE: $return_on_equity
+    - Debt/Equity: $debt_to_equity
+    - Fair Value: $$$fair_value
+    - Upside Potential: $upside_potential%
+    
+    Please provide:
+    1. Executive Summary
+    2. Investment Thesis (Bull Case)
+    3. Key Risks (Bear Case)
+    4. Valuation Assessment
+    5. Investment Recommendation with Time Horizon
+    6. Key Catalysts to Watch
+    
+    Format as a professional investment report.
+    """))
+
+_RISK_TEMPLATE = string.Template(textwrap.dedent("""
+    Provide a comprehensive risk assessment for $symbol.
+    
+    Financial Metrics:
+    - P/E Ratio: $pe_ratio
+    - Debt/Equity: $debt_to_equity
+    - Beta: $beta
+    - Volatility: $volatility
+    - RSI: $rsi
+    
+    Please assess:
+    1. Market Risk
+    2. Financial Risk
+    3. Operational Risk
+    4. Regulatory Risk
+    5. Liquidity Risk
+    6. Overall Risk Score (1-10)
+    7. Risk Mitigation Strategies
+    
+    Provide specific, actionable insights.
+    """))
+
+# Per-analysis-type prompt builder, system prompt, result key and error wording
+ANALYSIS_TYPES = {
+    'comprehensive_report': {
+        'prompt': '_create_analysis_prompt',
+        'system': "You are a professional financial analyst with expertise in stock valuation and investment analysis. Provide detailed, accurate, and actionable insights.",
+        'key': 'ai_analysis',
+        'label': 'AI analysis',
+        'unavailable': 'AI analysis unavailable due to technical issues.',
+        'log': 'AI analysis'
+    },
+    'investment_thesis': {
+        'prompt': '_create_thesis_prompt',
+        'system': "You are a senior investment analyst at a top-tier investment firm. Write professional, detailed investment theses that institutional investors would find valuable.",
+        'key': 'investment_thesis',
+        'label': 'Investment thesis generation',
+        'unavailable': 'Investment thesis unavailable due to technical issues.',
+        'log': 'investment thesis'
+    },
+    'risk_assessment': {
+        'prompt': '_create_risk_prompt',
+        'system': "You are a risk management expert specializing in equity analysis. Provide detailed, quantitative risk assessments with specific mitigation strategies.",
+        'key': 'risk_assessment',
+        'label': 'Risk assessment generation',
+        'unavailable': 'Risk assessment unavailable due to technical issues.',
+        'log': 'risk assessment'
+    }
+}
+
 class AIAnalyzer:
     """AI-powered stock analysis using OpenAI GPT models"""
     
     def __init__(self):
-        # Set up OpenAI client
+        # Set up OpenAI client once; building one per call re-creates the SSL context
         openai.api_key = OPENAI_API_KEY
+        self._ssl_ctx = ssl.create_default_context()
+        # Keep connections warm between the report, thesis and risk calls for a symbol
+        self._limits = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+        self.client = openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=httpx.Client(limits=self._limits, verify=self._ssl_ctx)
+        )
+        # Async client for generate_all, one per event loop; its connections can't outlive their loop
+        self._aclient = None
+        self._aclient_loop = None
+        self._cache = FileCache(ttl_seconds=PROMPT_CACHE_TTL, cache_dir=os.path.join(".cache", "ai"))
         self.model = DEFAULT_MODEL
         self.max_tokens = MAX_TOKENS
         self.temperature = TEMPERATURE
     
+    def close(self):
+        """Close the underlying HTTP connections"""
+        self.client.close()
+    
+    async def aclose(self):
+        """Close the underlying async HTTP connections"""
+        if self._aclient is not None:
+            await self._aclient.close()
+            self._aclient = None
+    
     def generate_analysis_report(self, stock_data: Dict) -> Dict:
         """
         Generate comprehensive AI analysis report
@@ -30,226 +179,331 @@ class AIAnalyzer:
         Args:
             stock_data: Complete stock analysis data
         """
+        return self._generate('comprehensive_report', stock_data)
+    
+    def generate_investment_thesis(self, stock_data: Dict) -> Dict:
+        """
+        Generate investment thesis using AI
+        
+        Args:
+            stock_data: Stock analysis data
+        """
+        return self._generate('investment_thesis', stock_data)
+    
+    def generate_risk_assessment(self, stock_data: Dict) -> Dict:
+        """
+        Generate AI-powered risk assessment
+        
+        Args:
+            stock_data: Stock analysis data
+        """
+        return self._generate('risk_assessment', stock_data)
+    
+    def generate_analysis_report_stream(self, stock_data: Dict) -> Iterator[str]:
+        """Yield the analysis report text as GPT generates it"""
+        return self._stream('comprehensive_report', stock_data)
+    
+    def generate_investment_thesis_stream(self, stock_data: Dict) -> Iterator[str]:
+        """Yield the investment thesis text as GPT generates it"""
+        return self._stream('investment_thesis', stock_data)
+    
+    def generate_risk_assessment_stream(self, stock_data: Dict) -> Iterator[str]:
+        """Yield the risk assessment text as GPT generates it"""
+        return self._stream('risk_assessment', stock_data)
+    
+    def generate_analysis_report_multi(self, stock_data_list: List[Dict]) -> Dict[str, Dict]:
+        """
+        Generate analysis reports for several stocks in a single request
+        
+        Args:
+            stock_data_list: Complete stock analysis data for each symbol
+        """
+        symbols = [stock_data.get('symbol', 'Unknown') for stock_data in stock_data_list]
         try:
-            # Prepare the prompt
-            prompt = self._create_analysis_prompt(stock_data)
+            sections = [
+                f"=== Symbol {i}: {symbol} ===\n{self._create_analysis_prompt(stock_data)}"
+                for i, (symbol, stock_data) in enumerate(zip(symbols, stock_data_list), 1)
+            ]
+            prompt = "\n\n".join(sections) + (
+                "\n\nReturn a JSON object of the form "
+                '{"reports": [{"symbol": "<ticker>", "analysis": "<report text>"}]} '
+                "with one entry per symbol above, in the same order."
+            )
             
-            # Call OpenAI API
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
+            # Leave room for every report in one completion
+            response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional financial analyst with expertise in stock valuation and investment analysis. Provide detailed, accurate, and actionable insights."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
+                    {"role": "system", "content": ANALYSIS_TYPES['comprehensive_report']['system']},
+                    {"role": "user", "content": prompt}
                 ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+                max_tokens=self.max_tokens * len(stock_data_list),
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
             )
             
-            # Parse the response
-            ai_analysis = response.choices[0].message.content
-            
-            return {
-                'ai_analysis': ai_analysis,
-                'model_used': self.model,
-                'analysis_type': 'comprehensive_report'
+            reports = json.loads(response.choices[0].message.content).get('reports', [])
+            results = {
+                report.get('symbol'): self._result('comprehensive_report', report.get('analysis', ''))
+                for report in reports
             }
             
+            # Symbols the model dropped fall back to the standard error shape
+            for symbol in symbols:
+                if symbol not in results:
+                    results[symbol] = self._failure('comprehensive_report', 'missing from multi-symbol response')
+            return results
+            
         except Exception as e:
-            logger.error(f"Error generating AI analysis: {e}")
-            return {
-                'error': f'AI analysis failed: {str(e)}',
-                'ai_analysis': 'AI analysis unavailable due to technical issues.'
-            }
+            return {symbol: self._failure('comprehensive_report', e) for symbol in symbols}
     
-    def generate_investment_thesis(self, stock_data: Dict) -> Dict:
+    async def agenerate_analysis_report(self, stock_data: Dict) -> Dict:
+        """Async variant of generate_analysis_report"""
+        return await self._agenerate('comprehensive_report', stock_data)
+    
+    async def agenerate_investment_thesis(self, stock_data: Dict) -> Dict:
+        """Async variant of generate_investment_thesis"""
+        return await self._agenerate('investment_thesis', stock_data)
+    
+    async def agenerate_risk_assessment(self, stock_data: Dict) -> Dict:
+        """Async variant of generate_risk_assessment"""
+        return await self._agenerate('risk_assessment', stock_data)
+    
+    async def generate_all(self, stock_data: Dict) -> List[Dict]:
+        """Run the report, thesis and risk analyses concurrently"""
+        return await asyncio.gather(
+            self.agenerate_analysis_report(stock_data),
+            self.agenerate_investment_thesis(stock_data),
+            self.agenerate_risk_assessment(stock_data)
+        )
+    
+    def submit_portfolio_batch(self, stock_data_list: List[Dict]) -> Dict:
         """
-        Generate investment thesis using AI
+        Queue every analysis type for each stock as one OpenAI batch job
         
         Args:
-            stock_data: Stock analysis data
+            stock_data_list: Stock analysis data for each portfolio symbol
         """
         try:
-            symbol = stock_data.get('symbol', 'Unknown')
-            stock_info = stock_data.get('stock_info', {})
-            metrics = stock_data.get('metrics', {})
-            valuation = stock_data.get('valuation', {})
-            
-            prompt = f"""
-            Generate a comprehensive investment thesis for {symbol} ({stock_info.get('name', 'Unknown Company')}).
-            
-            Key Data:
-            - Current Price: ${stock_info.get('current_price', 0):.2f}
-            - Market Cap: ${stock_info.get('market_cap', 0):,.0f}
-            - Sector: {stock_info.get('sector', 'N/A')}
-            - P/E Ratio: {metrics.get('pe_ratio', 0):.1f}
-            - ROE: {metrics.get('return_on_equity', 0):.1%}
-            - Debt/Equity: {metrics.get('debt_to_equity', 0):.1f}
-            - Fair Value: ${valuation.get('average_fair_value', 0):.2f}
-            - Upside Potential: {valuation.get('upside_potential', 0):.1f}%
-            
-            Please provide:
-            1. Executive Summary
-            2. Investment Thesis (Bull Case)
-            3. Key Risks (Bear Case)
-            4. Valuation Assessment
-            5. Investment Recommendation with Time Horizon
-            6. Key Catalysts to Watch
-            
-            Format as a professional investment report.
-            """
+            lines = []
+            for stock_data in stock_data_list:
+                symbol = stock_data.get('symbol', 'Unknown')
+                for analysis_type in ANALYSIS_TYPES:
+                    lines.append(json.dumps({
+                        'custom_id': f"{symbol}:{analysis_type}",
+                        'method': 'POST',
+                        'url': '/v1/chat/completions',
+                        'body': self._request(analysis_type, stock_data)
+                    }))
             
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a senior investment analyst at a top-tier investment firm. Write professional, detailed investment theses that institutional investors would find valuable."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            batch_file = self.client.files.create(
+                file=('portfolio_batch.jsonl', '\n'.join(lines).encode('utf-8')),
+                purpose='batch'
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h'
             )
             
             return {
-                'investment_thesis': response.choices[0].message.content,
-                'model_used': self.model,
-                'analysis_type': 'investment_thesis'
+                'batch_id': batch.id,
+                'status': batch.status,
+                'request_count': len(lines)
             }
             
         except Exception as e:
-            logger.error(f"Error generating investment thesis: {e}")
-            return {
-                'error': f'Investment thesis generation failed: {str(e)}',
-                'investment_thesis': 'Investment thesis unavailable due to technical issues.'
-            }
+            logger.error(f"Error submitting portfolio batch: {e}")
+            return {'error': f'Batch submission failed: {str(e)}'}
     
-    def generate_risk_assessment(self, stock_data: Dict) -> Dict:
+    def poll_batch(self, batch_id: str) -> Dict:
         """
-        Generate AI-powered risk assessment
+        Check a batch job and collect its results once it has completed
         
         Args:
-            stock_data: Stock analysis data
+            batch_id: ID returned by submit_portfolio_batch
         """
         try:
-            symbol = stock_data.get('symbol', 'Unknown')
-            metrics = stock_data.get('metrics', {})
-            technical = stock_data.get('technical_analysis', {})
-            
-            prompt = f"""
-            Provide a comprehensive risk assessment for {symbol}.
-            
-            Financial Metrics:
-            - P/E Ratio: {metrics.get('pe_ratio', 0):.1f}
-            - Debt/Equity: {metrics.get('debt_to_equity', 0):.1f}
-            - Beta: {metrics.get('beta', 0):.1f}
-            - Volatility: {technical.get('volatility', 0):.1%}
-            - RSI: {technical.get('rsi', 0):.1f}
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status != 'completed':
+                return {'batch_id': batch_id, 'status': batch.status}
             
-            Please assess:
-            1. Market Risk
-            2. Financial Risk
-            3. Operational Risk
-            4. Regulatory Risk
-            5. Liquidity Risk
-            6. Overall Risk Score (1-10)
-            7. Risk Mitigation Strategies
+            # Results are keyed by symbol, then analysis type, in the same shape as the sync methods
+            results = {}
+            lines = []
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    lines.extend(self.client.files.content(file_id).text.splitlines())
+            for line in lines:
+                if not line:
+                    continue
+                item = json.loads(line)
+                symbol, analysis_type = item['custom_id'].rsplit(':', 1)
+                response = item.get('response') or {}
+                if item.get('error') or response.get('status_code') != 200:
+                    error = item.get('error') or response.get('body', {}).get('error')
+                    results.setdefault(symbol, {})[analysis_type] = self._failure(analysis_type, error)
+                else:
+                    content = response['body']['choices'][0]['message']['content']
+                    results.setdefault(symbol, {})[analysis_type] = self._result(analysis_type, content)
             
-            Provide specific, actionable insights.
-            """
-            
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a risk management expert specializing in equity analysis. Provide detailed, quantitative risk assessments with specific mitigation strategies."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
-            )
-            
-            return {
-                'risk_assessment': response.choices[0].message.content,
-                'model_used': self.model,
-                'analysis_type': 'risk_assessment'
-            }
+            return {'batch_id': batch_id, 'status': batch.status, 'results': results}
             
         except Exception as e:
-            logger.error(f"Error generating risk assessment: {e}")
-            return {
-                'error': f'Risk assessment generation failed: {str(e)}',
-                'risk_assessment': 'Risk assessment unavailable due to technical issues.'
-            }
+            logger.error(f"Error polling batch {batch_id}: {e}")
+            return {'error': f'Batch polling failed: {str(e)}'}
+    
+    def _generate(self, analysis_type: str, stock_data: Dict) -> Dict:
+        """Run one analysis type through the sync client"""
+        try:
+            return self._result(analysis_type, ''.join(self._stream(analysis_type, stock_data)))
+        except Exception as e:
+            return self._failure(analysis_type, e)
+    
+    def _stream(self, analysis_type: str, stock_data: Dict) -> Iterator[str]:
+        """Yield one analysis type's text as it arrives, caching the full response"""
+        request = self._request(analysis_type, stock_data)
+        symbol, params = stock_data.get('symbol', 'Unknown'), self._cache_params(request)
+        content = self._cache.get(symbol, analysis_type, params)
+        if content is not None:
+            yield content
+            return
+        
+        parts = []
+        for chunk in self.client.chat.completions.create(**request, stream=True):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        self._cache.set(symbol, analysis_type, ''.join(parts), params)
+    
+    async def _agenerate(self, analysis_type: str, stock_data: Dict) -> Dict:
+        """Run one analysis type through the async client"""
+        try:
+            request = self._request(analysis_type, stock_data)
+            symbol, params = stock_data.get('symbol', 'Unknown'), self._cache_params(request)
+            content = self._cache.get(symbol, analysis_type, params)
+            if content is None:
+                response = await self._get_aclient().chat.completions.create(**request)
+                content = response.choices[0].message.content
+                self._cache.set(symbol, analysis_type, content, params)
+            return self._result(analysis_type, content)
+        except Exception as e:
+            return self._failure(analysis_type, e)
+    
+    def _get_aclient(self) -> openai.AsyncOpenAI:
+        """Get the async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = openai.AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                http_client=httpx.AsyncClient(limits=self._limits, verify=self._ssl_ctx)
+            )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    def _request(self, analysis_type: str, stock_data: Dict) -> Dict:
+        """Build chat completion kwargs for an analysis type"""
+        spec = ANALYSIS_TYPES[analysis_type]
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": spec['system']},
+                {"role": "user", "content": getattr(self, spec['prompt'])(stock_data)}
+            ],
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        }
+    
+    def _cache_params(self, request: Dict) -> Dict:
+        """Exact-match cache key over model, prompts and temperature"""
+        payload = json.dumps(
+            [request['model'], request['messages'], request['temperature']],
+            sort_keys=True
+        )
+        return {'prompt_sha256': hashlib.sha256(payload.encode('utf-8')).hexdigest()}
+    
+    def _result(self, analysis_type: str, content: str) -> Dict:
+        """Wrap model output in the per-type result dict"""
+        return {
+            ANALYSIS_TYPES[analysis_type]['key']: content,
+            'model_used': self.model,
+            'analysis_type': analysis_type
+        }
+    
+    def _failure(self, analysis_type: str, error: Exception) -> Dict:
+        """Build the per-type error dict"""
+        spec = ANALYSIS_TYPES[analysis_type]
+        logger.error(f"Error generating {spec['log']}: {error}")
+        return {
+            'error': f"{spec['label']} failed: {str(error)}",
+            spec['key']: spec['unavailable']
+        }
     
     def _create_analysis_prompt(self, stock_data: Dict) -> str:
         """Create comprehensive analysis prompt"""
         
-        symbol = stock_data.get('symbol', 'Unknown')
         stock_info = stock_data.get('stock_info', {})
         metrics = stock_data.get('metrics', {})
         valuation = stock_data.get('valuation', {})
         technical = stock_data.get('technical_analysis', {})
         recommendation = stock_data.get('recommendation', {})
         
-        prompt = f"""
-        Analyze {symbol} ({stock_info.get('name', 'Unknown Company')}) and provide a comprehensive investment analysis.
-        
-        COMPANY OVERVIEW:
-        - Current Price: ${stock_info.get('current_price', 0):.2f}
-        - Market Cap: ${stock_info.get('market_cap', 0):,.0f}
-        - Sector: {stock_info.get('sector', 'N/A')}
-        - Industry: {stock_info.get('industry', 'N/A')}
-        
-        FINANCIAL METRICS:
-        - P/E Ratio: {metrics.get('pe_ratio', 0):.1f}
-        - P/B Ratio: {metrics.get('price_to_book', 0):.1f}
-        - ROE: {metrics.get('return_on_equity', 0):.1%}
-        - ROA: {metrics.get('return_on_assets', 0):.1%}
-        - Debt/Equity: {metrics.get('debt_to_equity', 0):.1f}
-        - Profit Margin: {metrics.get('profit_margin', 0):.1%}
-        - Revenue Growth: {metrics.get('revenue_growth', 0):.1%}
-        - Earnings Growth: {metrics.get('earnings_growth', 0):.1%}
-        
-        VALUATION:
-        - Fair Value: ${valuation.get('average_fair_value', 0):.2f}
-        - Upside/Downside: {valuation.get('upside_potential', 0):.1f}%
-        
-        TECHNICAL ANALYSIS:
-        - RSI: {technical.get('rsi', 0):.1f}
-        - Volatility: {technical.get('volatility', 0):.1%}
-        - Price vs 200-day MA: {technical.get('price_vs_ma', {}).get('vs_ma_200', 0):.1f}%
+        return _ANALYSIS_TEMPLATE.substitute(
+            symbol=stock_data.get('symbol', 'Unknown'),
+            name=stock_info.get('name', 'Unknown Company'),
+            current_price=f"{stock_info.get('current_price', 0):.2f}",
+            market_cap=f"{stock_info.get('market_cap', 0):,.0f}",
+            sector=stock_info.get('sector', 'N/A'),
+            industry=stock_info.get('industry', 'N/A'),
+            pe_ratio=f"{metrics.get('pe_ratio', 0):.1f}",
+            price_to_book=f"{metrics.get('price_to_book', 0):.1f}",
+            return_on_equity=f"{metrics.get('return_on_equity', 0):.1%}",
+            return_on_assets=f"{metrics.get('return_on_assets', 0):.1%}",
+            debt_to_equity=f"{metrics.get('debt_to_equity', 0):.1f}",
+            profit_margin=f"{metrics.get('profit_margin', 0):.1%}",
+            revenue_growth=f"{metrics.get('revenue_growth', 0):.1%}",
+            earnings_growth=f"{metrics.get('earnings_growth', 0):.1%}",
+            fair_value=f"{valuation.get('average_fair_value', 0):.2f}",
+            upside_potential=f"{valuation.get('upside_potential', 0):.1f}",
+            rsi=f"{technical.get('rsi', 0):.1f}",
+            volatility=f"{technical.get('volatility', 0):.1%}",
+            vs_ma_200=f"{technical.get('price_vs_ma', {}).get('vs_ma_200', 0):.1f}",
+            recommendation=recommendation.get('recommendation', 'N/A'),
+            score=recommendation.get('score', 0)
+        )
+    
+    def _create_thesis_prompt(self, stock_data: Dict) -> str:
+        """Create investment thesis prompt"""
         
-        RECOMMENDATION: {recommendation.get('recommendation', 'N/A')} (Score: {recommendation.get('score', 0)})
+        stock_info = stock_data.get('stock_info', {})
+        metrics = stock_data.get('metrics', {})
+        valuation = stock_data.get('valuation', {})
         
-        Please provide:
-        1. Executive Summary
-        2. Strengths and Opportunities
-        3. Weaknesses and Threats
-        4. Valuation Analysis
-        5. Technical Outlook
-        6. Investment Recommendation with Rationale
-        7. Key Risks and Mitigation
-        8. Price Targets and Time Horizon
+        return _THESIS_TEMPLATE.substitute(
+            symbol=stock_data.get('symbol', 'Unknown'),
+            name=stock_info.get('name', 'Unknown Company'),
+            current_price=f"{stock_info.get('current_price', 0):.2f}",
+            market_cap=f"{stock_info.get('market_cap', 0):,.0f}",
+            sector=stock_info.get('sector', 'N/A'),
+            pe_ratio=f"{metrics.get('pe_ratio', 0):.1f}",
+            return_on_equity=f"{metrics.get('return_on_equity', 0):.1%}",
+            debt_to_equity=f"{metrics.get('debt_to_equity', 0):.1f}",
+            fair_value=f"{valuation.get('average_fair_value', 0):.2f}",
+            upside_potential=f"{valuation.get('upside_potential', 0):.1f}"
+        )
+    
+    def _create_risk_prompt(self, stock_data: Dict) -> str:
+        """Create risk assessment prompt"""
         
-        Format as a professional investment research report.
-        """
+        metrics = stock_data.get('metrics', {})
+        technical = stock_data.get('technical_analysis', {})
         
-        return prompt
+        return _RISK_TEMPLATE.substitute(
+            symbol=stock_data.get('symbol', 'Unknown'),
+            pe_ratio=f"{metrics.get('pe_ratio', 0):.1f}",
+            debt_to_equity=f"{metrics.get('debt_to_equity', 0):.1f}",
+            beta=f"{metrics.get('beta', 0):.1f}",
+            volatility=f"{technical.get('volatility', 0):.1%}",
+            rsi=f"{technical.get('rsi', 0):.1f}"
+        )
@@ -3,14 +3,97 @@ Alpha Vantage Integration for CROC Investment Fund
 Example of adding a new data source
 """
 
+import asyncio
+import time
+from collections import OrderedDict, deque
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import os
 from dotenv import load_dotenv
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
+
+from tools.cache import FileCache
+
+# orjson is optional; it parses the large statement payloads much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
+# Fundamentals change at most quarterly, so a day-old response is still current
+RESPONSE_CACHE_TTL = 86400
+MEMO_SIZE = 256
+
+# Alpha Vantage function -> key in get_full_fundamentals results
+FUNDAMENTAL_FUNCTIONS = {
+    'OVERVIEW': 'overview',
+    'EARNINGS': 'earnings',
+    'INCOME_STATEMENT': 'income_statement',
+    'BALANCE_SHEET': 'balance_sheet',
+    'CASH_FLOW': 'cash_flow'
+}
+
+# Our overview keys -> Alpha Vantage OVERVIEW fields
+_OVERVIEW_FIELD_MAP = {
+    "symbol": "Symbol",
+    "name": "Name",
+    "description": "Description",
+    "sector": "Sector",
+    "industry": "Industry",
+    "market_cap": "MarketCapitalization",
+    "pe_ratio": "PERatio",
+    "peg_ratio": "PEGRatio",
+    "book_value": "BookValue",
+    "dividend_per_share": "DividendPerShare",
+    "dividend_yield": "DividendYield",
+    "eps": "EPS",
+    "revenue_per_share": "RevenuePerShareTTM",
+    "profit_margin": "ProfitMargin",
+    "operating_margin": "OperatingMarginTTM",
+    "return_on_assets": "ReturnOnAssetsTTM",
+    "return_on_equity": "ReturnOnEquityTTM",
+    "revenue_ttm": "RevenueTTM",
+    "gross_profit_ttm": "GrossProfitTTM",
+    "diluted_eps_ttm": "DilutedEPSTTM",
+    "quarterly_earnings_growth": "QuarterlyEarningsGrowthYOY",
+    "quarterly_revenue_growth": "QuarterlyRevenueGrowthYOY",
+    "analyst_target_price": "AnalystTargetPrice",
+    "trailing_pe": "TrailingPE",
+    "forward_pe": "ForwardPE",
+    "price_to_sales_ratio": "PriceToSalesRatioTTM",
+    "price_to_book_ratio": "PriceToBookRatio",
+    "ev_to_revenue": "EVToRevenue",
+    "ev_to_ebitda": "EVToEBITDA",
+    "beta": "Beta",
+    "52_week_high": "52WeekHigh",
+    "52_week_low": "52WeekLow",
+    "50_day_moving_average": "50DayMovingAverage",
+    "200_day_moving_average": "200DayMovingAverage",
+    "shares_outstanding": "SharesOutstanding",
+    "dividend_date": "DividendDate",
+    "ex_dividend_date": "ExDividendDate"
+}
+
+# Overview keys whose string values are numbers ("None"/"-" become NaN)
+_NUMERIC_FIELDS = frozenset(_OVERVIEW_FIELD_MAP) - {
+    "symbol", "name", "description", "sector", "industry", "dividend_date", "ex_dividend_date"
+}
+
+# Our keys -> Alpha Vantage list fields for the earnings and statement endpoints
+_EARNINGS_FIELD_MAP = {
+    "annual_earnings": "annualEarnings",
+    "quarterly_earnings": "quarterlyEarnings"
+}
+_REPORTS_FIELD_MAP = {
+    "annual_reports": "annualReports",
+    "quarterly_reports": "quarterlyReports"
+}
+
 class AlphaVantageIntegration:
     """Alpha Vantage API integration for enhanced financial data"""
     
@@ -18,175 +101,157 @@ class AlphaVantageIntegration:
         self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.base_url = "https://www.alphavantage.co/query"
         self.rate_limit_delay = 12  # Alpha Vantage free tier: 5 calls per minute
+        # All endpoints share one host, so keep a single keep-alive connection pool
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        ))
+        # Start times of the last five async calls, for the 5-per-minute limit
+        self._call_times = deque(maxlen=5)
+        # Raw responses: in-process LRU in front of a day-long disk cache
+        self._memo = OrderedDict()
+        self._cache = FileCache(ttl_seconds=RESPONSE_CACHE_TTL, cache_dir=os.path.join(".cache", "alpha_vantage"))
     
     def is_available(self) -> bool:
         """Check if Alpha Vantage API is available"""
         return bool(self.api_key)
     
-    def get_company_overview(self, symbol: str) -> Dict:
+    def get_company_overview(self, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
         """Get comprehensive company overview"""
-        if not self.is_available():
-            return {"error": "Alpha Vantage API key not available"}
-        
-        try:
-            params = {
-                'function': 'OVERVIEW',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'Error Message' in data:
-                return {"error": data['Error Message']}
-            
-            return {
-                "symbol": data.get('Symbol', symbol),
-                "name": data.get('Name', ''),
-                "description": data.get('Description', ''),
-                "sector": data.get('Sector', ''),
-                "industry": data.get('Industry', ''),
-                "market_cap": data.get('MarketCapitalization', ''),
-                "pe_ratio": data.get('PERatio', ''),
-                "peg_ratio": data.get('PEGRatio', ''),
-                "book_value": data.get('BookValue', ''),
-                "dividend_per_share": data.get('DividendPerShare', ''),
-                "dividend_yield": data.get('DividendYield', ''),
-                "eps": data.get('EPS', ''),
-                "revenue_per_share": data.get('RevenuePerShareTTM', ''),
-                "profit_margin": data.get('ProfitMargin', ''),
-                "operating_margin": data.get('OperatingMarginTTM', ''),
-                "return_on_assets": data.get('ReturnOnAssetsTTM', ''),
-                "return_on_equity": data.get('ReturnOnEquityTTM', ''),
-                "revenue_ttm": data.get('RevenueTTM', ''),
-                "gross_profit_ttm": data.get('GrossProfitTTM', ''),
-                "diluted_eps_ttm": data.get('DilutedEPSTTM', ''),
-                "quarterly_earnings_growth": data.get('QuarterlyEarningsGrowthYOY', ''),
-                "quarterly_revenue_growth": data.get('QuarterlyRevenueGrowthYOY', ''),
-                "analyst_target_price": data.get('AnalystTargetPrice', ''),
-                "trailing_pe": data.get('TrailingPE', ''),
-                "forward_pe": data.get('ForwardPE', ''),
-                "price_to_sales_ratio": data.get('PriceToSalesRatioTTM', ''),
-                "price_to_book_ratio": data.get('PriceToBookRatio', ''),
-                "ev_to_revenue": data.get('EVToRevenue', ''),
-                "ev_to_ebitda": data.get('EVToEBITDA', ''),
-                "beta": data.get('Beta', ''),
-                "52_week_high": data.get('52WeekHigh', ''),
-                "52_week_low": data.get('52WeekLow', ''),
-                "50_day_moving_average": data.get('50DayMovingAverage', ''),
-                "200_day_moving_average": data.get('200DayMovingAverage', ''),
-                "shares_outstanding": data.get('SharesOutstanding', ''),
-                "dividend_date": data.get('DividendDate', ''),
-                "ex_dividend_date": data.get('ExDividendDate', '')
-            }
-            
-        except Exception as e:
-            return {"error": f"Alpha Vantage API error: {str(e)}"}
+        return self._query('OVERVIEW', symbol, fields)
     
-    def get_earnings_data(self, symbol: str) -> Dict:
+    def get_earnings_data(self, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
         """Get earnings data and estimates"""
+        return self._query('EARNINGS', symbol, fields)
+    
+    def get_income_statement(self, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
+        """Get income statement data"""
+        return self._query('INCOME_STATEMENT', symbol, fields)
+    
+    def get_balance_sheet(self, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
+        """Get balance sheet data"""
+        return self._query('BALANCE_SHEET', symbol, fields)
+    
+    def get_cash_flow(self, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
+        """Get cash flow data"""
+        return self._query('CASH_FLOW', symbol, fields)
+    
+    async def get_full_fundamentals(self, symbol: str) -> Dict:
+        """Fetch overview, earnings and the three statements concurrently"""
         if not self.is_available():
             return {"error": "Alpha Vantage API key not available"}
         
-        try:
-            params = {
-                'function': 'EARNINGS',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'Error Message' in data:
-                return {"error": data['Error Message']}
-            
-            return {
-                "annual_earnings": data.get('annualEarnings', []),
-                "quarterly_earnings": data.get('quarterlyEarnings', [])
-            }
-            
-        except Exception as e:
-            return {"error": f"Alpha Vantage API error: {str(e)}"}
+        async with httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=5)) as client:
+            results = await asyncio.gather(*[
+                self._aquery(client, function, symbol) for function in FUNDAMENTAL_FUNCTIONS
+            ])
+        return dict(zip(FUNDAMENTAL_FUNCTIONS.values(), results))
     
-    def get_income_statement(self, symbol: str) -> Dict:
-        """Get income statement data"""
+    def _query(self, function: str, symbol: str, fields: Optional[Set[str]] = None) -> Dict:
+        """Request one Alpha Vantage function and shape the response"""
         if not self.is_available():
             return {"error": "Alpha Vantage API key not available"}
         
         try:
-            params = {
-                'function': 'INCOME_STATEMENT',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'Error Message' in data:
-                return {"error": data['Error Message']}
-            
-            return {
-                "annual_reports": data.get('annualReports', []),
-                "quarterly_reports": data.get('quarterlyReports', [])
-            }
-            
+            data = self._cached_response(function, symbol)
+            if data is None:
+                response = self.session.get(self.base_url, params=self._params(function, symbol))
+                data = self._store_response(function, symbol, self._decode(response))
+            return self._shape(function, symbol, data, fields)
         except Exception as e:
             return {"error": f"Alpha Vantage API error: {str(e)}"}
     
-    def get_balance_sheet(self, symbol: str) -> Dict:
-        """Get balance sheet data"""
-        if not self.is_available():
-            return {"error": "Alpha Vantage API key not available"}
-        
+    async def _aquery(self, client: "httpx.AsyncClient", function: str, symbol: str) -> Dict:
+        """Async variant of _query, throttled to the free-tier call rate"""
         try:
-            params = {
-                'function': 'BALANCE_SHEET',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'Error Message' in data:
-                return {"error": data['Error Message']}
-            
-            return {
-                "annual_reports": data.get('annualReports', []),
-                "quarterly_reports": data.get('quarterlyReports', [])
-            }
-            
+            data = self._cached_response(function, symbol)
+            if data is None:
+                await self._throttle()
+                response = await client.get(self.base_url, params=self._params(function, symbol))
+                data = self._store_response(function, symbol, self._decode(response))
+            return self._shape(function, symbol, data)
         except Exception as e:
             return {"error": f"Alpha Vantage API error: {str(e)}"}
     
-    def get_cash_flow(self, symbol: str) -> Dict:
-        """Get cash flow data"""
-        if not self.is_available():
-            return {"error": "Alpha Vantage API key not available"}
+    async def _throttle(self):
+        """Wait for a free slot in the rolling per-minute call window"""
+        now = time.monotonic()
+        start = now
+        if len(self._call_times) == self._call_times.maxlen:
+            start = max(now, self._call_times[0] + self.rate_limit_delay * self._call_times.maxlen)
+        # Reserve the slot before sleeping so concurrent callers queue behind it
+        self._call_times.append(start)
+        if start > now:
+            await asyncio.sleep(start - now)
+    
+    def _cached_response(self, function: str, symbol: str) -> Optional[Dict]:
+        """Return a stored raw response from memory, then disk, or None"""
+        key = (function, symbol.upper())
+        data = self._memo.get(key)
+        if data is not None:
+            self._memo.move_to_end(key)
+            return data
         
-        try:
-            params = {
-                'function': 'CASH_FLOW',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
-            
-            if 'Error Message' in data:
-                return {"error": data['Error Message']}
-            
-            return {
-                "annual_reports": data.get('annualReports', []),
-                "quarterly_reports": data.get('quarterlyReports', [])
+        data = self._cache.get(symbol, function)
+        if data is not None:
+            self._remember(key, data)
+        return data
+    
+    def _store_response(self, function: str, symbol: str, data: Dict) -> Dict:
+        """Keep a successful raw response; errors and rate-limit notices are not cached"""
+        if not any(key in data for key in ('Error Message', 'Note', 'Information')):
+            self._remember((function, symbol.upper()), data)
+            self._cache.set(symbol, function, data)
+        return data
+    
+    def _remember(self, key, data: Dict):
+        """Insert into the in-process LRU, evicting the oldest entry when full"""
+        self._memo[key] = data
+        self._memo.move_to_end(key)
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+    
+    def _decode(self, response) -> Dict:
+        """Parse a requests or httpx response body"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    def _params(self, function: str, symbol: str) -> Dict:
+        """Build query parameters for a function"""
+        return {
+            'function': function,
+            'symbol': symbol,
+            'apikey': self.api_key
+        }
+    
+    def _shape(self, function: str, symbol: str, data: Dict, fields: Optional[Set[str]] = None) -> Dict:
+        """Map a raw response onto the getter's result dict, optionally keeping only some keys"""
+        if 'Error Message' in data:
+            return {"error": data['Error Message']}
+        
+        if function == 'OVERVIEW':
+            result = {
+                ours: data.get(theirs, '') for ours, theirs in _OVERVIEW_FIELD_MAP.items()
+                if fields is None or ours in fields
             }
+            if 'symbol' in result:
+                result['symbol'] = data.get('Symbol', symbol)
             
-        except Exception as e:
-            return {"error": f"Alpha Vantage API error: {str(e)}"}
+            # One vectorized parse for every numeric field instead of per-value float()
+            numeric = [key for key in result if key in _NUMERIC_FIELDS]
+            if numeric:
+                values = pd.to_numeric(pd.Series([result[key] for key in numeric]), errors='coerce')
+                result.update(zip(numeric, values.tolist()))
+            return result
+        
+        field_map = _EARNINGS_FIELD_MAP if function == 'EARNINGS' else _REPORTS_FIELD_MAP
+        return {
+            ours: data.get(theirs, []) for ours, theirs in field_map.items()
+            if fields is None or ours in fields
+        }
 
 def display_alpha_vantage_data(data: Dict, st):
     """Display Alpha Vantage data in Streamlit"""
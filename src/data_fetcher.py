@@ -3,62 +3,162 @@ Stock Data Fetcher Module
 Handles fetching stock data from various sources
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import requests
-from typing import Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from tools.cache import FileCache
+
 logger = logging.getLogger(__name__)
 
+# Seconds a fetched .info dict is reused before hitting Yahoo again
+INFO_CACHE_TTL = 300
+
+# Pooled Yahoo connections, and the concurrent requests one get_bundle makes
+POOL_SIZE = 32
+BUNDLE_FETCHES = 5
+
 class StockDataFetcher:
     """Fetches stock data from Yahoo Finance and other sources"""
     
+    # Seconds each Yahoo endpoint is served from the on-disk cache
+    CACHE_TTLS = {
+        'info': 900,
+        'history': 3600,
+        'financials': 86400
+    }
+    
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Pool Yahoo connections across symbols and back off on 429/5xx
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=POOL_SIZE,
+            pool_maxsize=POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        self._ticker_cache: Dict[str, yf.Ticker] = {}
+        self._info_cache: Dict[str, Tuple[float, dict]] = {}
+        self._info_locks: Dict[str, threading.Lock] = {}
+        self._cache = FileCache(cache_dir=os.path.join(".cache", "stock_data"))
+    
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        """Reuse one Ticker per symbol"""
+        ticker = self._ticker_cache.get(symbol)
+        if ticker is None:
+            ticker = self._ticker_cache[symbol] = yf.Ticker(symbol, session=self.session)
+        return ticker
+    
+    def _get_info(self, symbol: str) -> dict:
+        """Return the symbol's .info, shared by get_stock_info and get_key_metrics"""
+        # get_bundle asks for info from two threads at once; only one should fetch it
+        with self._info_locks.setdefault(symbol, threading.Lock()):
+            cached = self._info_cache.get(symbol)
+            if cached is not None and time.time() - cached[0] < INFO_CACHE_TTL:
+                return cached[1]
+            info = self._cached('info', symbol, lambda: self._ticker(symbol).info)
+            if info:
+                self._info_cache[symbol] = (time.time(), info)
+            return info
+    
+    def _cached(self, endpoint: str, symbol: str, fetch, params: Optional[Dict] = None):
+        """Read a yfinance response through the on-disk cache with the endpoint's TTL"""
+        return self._cache.get_or_fetch(
+            symbol, endpoint, fetch, params=params, ttl_seconds=self.CACHE_TTLS[endpoint]
+        )
+    
+    def get_bundle(self, symbol: str) -> Dict:
+        """Fetch info, history, statements, metrics and recommendations concurrently"""
+        with ThreadPoolExecutor(max_workers=BUNDLE_FETCHES) as executor:
+            futures = {
+                'stock_info': executor.submit(self.get_stock_info, symbol),
+                'historical_data': executor.submit(self.get_historical_data, symbol),
+                'financial_statements': executor.submit(self.get_financial_statements, symbol),
+                'key_metrics': executor.submit(self.get_key_metrics, symbol),
+                'analyst_recommendations': executor.submit(self.get_analyst_recommendations, symbol)
+            }
+            bundle = {name: future.result() for name, future in futures.items()}
+        bundle['symbol'] = symbol
+        return bundle
+    
+    def get_bundle_many(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch bundles for several symbols over the shared session"""
+        # Each bundle runs BUNDLE_FETCHES requests; stay within the pool so no connection is discarded
+        with ThreadPoolExecutor(max_workers=max(1, POOL_SIZE // BUNDLE_FETCHES)) as executor:
+            return dict(zip(symbols, executor.map(self.get_bundle, symbols)))
     
     def get_stock_info(self, symbol: str) -> Dict:
         """Get basic stock information"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            # Quote fields from the light fast_info endpoint; .info only for the descriptive fields
+            try:
+                fast = self._ticker(symbol).fast_info
+                quote = {
+                    'market_cap': fast['marketCap'],
+                    'current_price': fast['lastPrice'],
+                    'currency': fast['currency'],
+                    'exchange': fast['exchange']
+                }
+            except Exception:
+                quote = None
+            
+            info = self._get_info(symbol)
+            if quote is None:
+                quote = {
+                    'market_cap': info.get('marketCap', 0),
+                    'current_price': info.get('currentPrice', info.get('regularMarketPrice', 0)),
+                    'currency': info.get('currency', 'USD'),
+                    'exchange': info.get('exchange', 'N/A')
+                }
             
             return {
                 'symbol': symbol,
                 'name': info.get('longName', 'N/A'),
                 'sector': info.get('sector', 'N/A'),
                 'industry': info.get('industry', 'N/A'),
-                'market_cap': info.get('marketCap', 0),
-                'current_price': info.get('currentPrice', info.get('regularMarketPrice', 0)),
-                'currency': info.get('currency', 'USD'),
-                'exchange': info.get('exchange', 'N/A')
+                **quote
             }
         except Exception as e:
             logger.error(f"Error fetching stock info for {symbol}: {e}")
             return {}
     
     def get_historical_data(self, symbol: str, period: str = "1y") -> pd.DataFrame:
-        """Get historical stock data"""
+        """Get historical stock data (deprecated for close-only work; use get_close_prices)"""
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period)
+            ticker = self._ticker(symbol)
+            data = self._cached('history', symbol, lambda: ticker.history(period=period), params={'period': period})
             return data
         except Exception as e:
             logger.error(f"Error fetching historical data for {symbol}: {e}")
             return pd.DataFrame()
     
+    def get_close_prices(self, symbol: str, period: str = "1y") -> np.ndarray:
+        """Get adjusted closes as a contiguous float32 array"""
+        data = self.get_historical_data(symbol, period)
+        if data.empty:
+            return np.empty(0, dtype=np.float32)
+        return data['Close'].to_numpy(dtype=np.float32, copy=False)
+    
     def get_financial_statements(self, symbol: str) -> Dict:
         """Get financial statements (income, balance sheet, cash flow)"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             
             # Get financial statements
-            income_stmt = ticker.financials
-            balance_sheet = ticker.balance_sheet
-            cash_flow = ticker.cashflow
+            income_stmt, balance_sheet, cash_flow = self._cached(
+                'financials', symbol, lambda: (ticker.financials, ticker.balance_sheet, ticker.cashflow)
+            )
             
             return {
                 'income_statement': income_stmt,
@@ -72,8 +172,7 @@ class StockDataFetcher:
     def get_key_metrics(self, symbol: str) -> Dict:
         """Get key financial metrics"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = self._get_info(symbol)
             
             return {
                 'pe_ratio': info.get('trailingPE', 0),
@@ -97,7 +196,7 @@ class StockDataFetcher:
     def get_analyst_recommendations(self, symbol: str) -> Dict:
         """Get analyst recommendations and price targets"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self._ticker(symbol)
             recommendations = ticker.recommendations
             
             if recommendations is not None and not recommendations.empty:
@@ -3,24 +3,89 @@ Data Sources Integration Guide for CROC Investment Fund
 How to add more data sources and APIs
 """
 
+import asyncio
+import importlib.util
+import json
+import pickle
+import time
+from collections import deque
+import httpx
 import requests
 import pandas as pd
 import yfinance as yf
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 import os
 from dotenv import load_dotenv
 
+from tools.cache import FileCache
+
+# Redis and orjson are optional; without Redis responses are cached on disk
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyarrow is optional; cached DataFrames are stored as Arrow IPC instead of pickle
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# rusty-req is optional; a Rust/Tokio batch driver for very large bulk fetches
+try:
+    import rusty_req
+except ImportError:
+    rusty_req = None
+
+# ijson is optional; it parses list responses record by record instead of all at once
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 load_dotenv()
 
+# Concurrent requests allowed per API host
+HOST_CONCURRENCY = 8
+
+# HTTP/2 needs the h2 package (httpx[http2]); without it the client stays on HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 class DataSourceManager:
     """Manages multiple data sources for comprehensive analysis"""
     
+    # Seconds a response is served from cache, per data type; other types are never cached
+    CACHE_TTLS = {
+        'basic': 900,
+        'options': 300,
+        'news': 600,
+        'recommendations': 3600,
+        'fundamental': 86400,
+        'earnings': 3600,
+        'income_statement': 86400,
+        'trades': 5,
+        'quotes': 5,
+        'profile': 86400,
+        'sentiment': 3600,
+        'headlines': 600,
+        'filings': 3600,
+        'interest_rates': 3600
+    }
+    
+    # Route bulk HTTP fetches through rusty-req when it is installed
+    use_rust_backend = False
+    
     def __init__(self):
         self.sources = {
             'yahoo_finance': YahooFinanceSource(),
             'alpha_vantage': AlphaVantageSource(),
             'polygon': PolygonSource(),
-            'quandl': QuandlSource(),
             'finnhub': FinnhubSource(),
             'news_api': NewsAPISource(),
             'reddit_api': RedditAPISource(),
@@ -28,6 +93,13 @@ class DataSourceManager:
             'sec_edgar': SECEdgarSource(),
             'fred': FREDSource()
         }
+        # One pooled client per event loop; an httpx.AsyncClient can't cross loops
+        self._client = None
+        self._client_loop = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.redis = self._connect_redis()
+        self._cache = FileCache(cache_dir=os.path.join(".cache", "data_sources"))
     
     def get_available_sources(self) -> List[str]:
         """Get list of available data sources"""
@@ -35,21 +107,523 @@ class DataSourceManager:
     
     def get_data(self, source: str, symbol: str, data_type: str) -> Dict:
         """Get data from specified source"""
-        if source in self.sources:
-            return self.sources[source].get_data(symbol, data_type)
-        return {"error": f"Source {source} not available"}
+        if source not in self.sources:
+            return {"error": f"Source {source} not available"}
+        
+        key = self._cache_key(source, symbol, data_type)
+        ttl = self.CACHE_TTLS.get(data_type)
+        if ttl:
+            cached = self._cache_get(key, ttl)
+            if cached is not None:
+                return cached
+        
+        # Blocking callers go through the source's keep-alive session, not a throwaway event loop
+        data = self.sources[source].get_data_sync(symbol, data_type)
+        if ttl and 'error' not in data:
+            self._cache_set(key, ttl, data)
+        return data
+    
+    async def aget_data(self, source: str, symbol: str, data_type: str) -> Dict:
+        """Get data from specified source over the shared async client"""
+        if source not in self.sources:
+            return {"error": f"Source {source} not available"}
+        
+        key = self._cache_key(source, symbol, data_type)
+        ttl = self.CACHE_TTLS.get(data_type)
+        if ttl:
+            cached = self._cache_get(key, ttl)
+            if cached is not None:
+                return cached
+        
+        # Identical requests already on the wire share one fetch task; shielding it means a
+        # cancelled caller (e.g. a panel timeout) doesn't cancel the fetch for everyone else
+        client = self._get_client()
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(client, source, symbol, data_type, key, ttl))
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, client: "httpx.AsyncClient", source: str, symbol: str, data_type: str,
+                     key: str, ttl: Optional[int]) -> Dict:
+        """Run one deduplicated fetch and cache its result"""
+        try:
+            async with self._host_semaphore(source):
+                data = await self.sources[source].get_data(client, symbol, data_type)
+            
+            if ttl and 'error' not in data:
+                self._cache_set(key, ttl, data)
+            return data
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+    
+    async def get_data_bulk(self, source: str, symbols: List[str], data_type: str) -> Dict[str, Dict]:
+        """Fetch one data type for many symbols, sending only cache misses to the source"""
+        if source not in self.sources:
+            return {symbol: {"error": f"Source {source} not available"} for symbol in symbols}
+        
+        ttl = self.CACHE_TTLS.get(data_type)
+        results = {}
+        if ttl:
+            for symbol in symbols:
+                cached = self._cache_get(self._cache_key(source, symbol, data_type), ttl)
+                if cached is not None:
+                    results[symbol] = cached
+        
+        missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in results]
+        if missing:
+            fetched = await self._fetch_bulk_rust(source, missing, data_type)
+            if fetched is None:
+                fetched = await self.sources[source].get_data_bulk(self._get_client(), missing, data_type)
+            for symbol, data in fetched.items():
+                results[symbol] = data
+                if ttl and 'error' not in data:
+                    self._cache_set(self._cache_key(source, symbol, data_type), ttl, data)
+        
+        return {symbol: results[symbol] for symbol in symbols}
+    
+    async def get_data_stream(self, source: str, symbol: str, data_type: str) -> AsyncIterator[Dict]:
+        """Yield the records of a large list response as they are parsed"""
+        if source not in self.sources:
+            raise ValueError(f"Source {source} not available")
+        
+        client = self._get_client()
+        async with self._host_semaphore(source):
+            async for record in self.sources[source].get_data_stream(client, symbol, data_type):
+                yield record
+    
+    async def get_data_multi(self, symbol: str, plan: Dict[str, str]) -> Dict[str, Dict]:
+        """Fetch one data type from each planned source concurrently"""
+        results = await asyncio.gather(
+            *[self.aget_data(source, symbol, data_type) for source, data_type in plan.items()],
+            return_exceptions=True
+        )
+        return {
+            source: {"error": str(result)} if isinstance(result, BaseException) else result
+            for source, result in zip(plan, results)
+        }
+    
+    async def aclose(self):
+        """Close the shared async client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _fetch_bulk_rust(self, source: str, symbols: List[str], data_type: str) -> Optional[Dict[str, Dict]]:
+        """Fetch a bulk request with rusty-req, or return None to fall back to httpx"""
+        data_source = self.sources[source]
+        if not self.use_rust_backend or rusty_req is None or not data_source.is_available():
+            return None
+        # One unthrottled burst would blow a rate-limited source's quota; let it pace itself
+        if data_source.rate_limit < HOST_CONCURRENCY:
+            return None
+        
+        batch = []
+        for symbol in symbols:
+            request = data_source._request(symbol, data_type)
+            if request is None:
+                return None
+            url, params = request
+            batch.append({"url": url, "method": "GET", "params": params, "tag": symbol, "timeout": 5})
+        
+        try:
+            responses = await rusty_req.fetch_requests(batch, total_timeout=30, mode="JOIN_ALL")
+        except Exception:
+            return None
+        
+        results = {symbol: {"error": f"{data_source.name} error: no response"} for symbol in symbols}
+        for response in responses:
+            symbol = (response.get("meta") or {}).get("tag")
+            if symbol not in results:
+                continue
+            exception = response.get("exception") or {}
+            if exception.get("type"):
+                results[symbol] = {"error": f"{data_source.name} error: {exception.get('message', exception['type'])}"}
+                continue
+            content = (response.get("response") or {}).get("content", "")
+            try:
+                results[symbol] = data_source._result(
+                    data_type, response.get("http_status", 200), content.encode() if isinstance(content, str) else content
+                )
+            except Exception as e:
+                results[symbol] = {"error": f"{data_source.name} error: {str(e)}"}
+        return results
+    
+    @staticmethod
+    def _cache_key(source: str, symbol: str, data_type: str) -> str:
+        return f"{source}:{symbol.upper()}:{data_type}"
+    
+    def _cache_get(self, key: str, ttl: int) -> Optional[Dict]:
+        """Read a cached response from Redis, or from disk when Redis is not installed"""
+        if self.redis is None:
+            return self._cache.get(*self._file_key(key), ttl_seconds=ttl)
+        try:
+            payload = self.redis.get(key)
+            if payload is None:
+                return None
+            data, frames = _decode_payload(payload)
+            buffers = self.redis.mget([f"{key}:{name}.arrow" for name in frames]) if frames else []
+        except redis.RedisError:
+            return None
+        
+        # A DataFrame entry that expired or was evicted makes the whole response a miss
+        if any(buffer is None for buffer in buffers):
+            return None
+        for name, buffer in zip(frames, buffers):
+            data[name] = pa.ipc.deserialize_pandas(buffer)
+        return data
+    
+    def _cache_set(self, key: str, ttl: int, data: Dict):
+        """Store a response with its TTL; an unreachable Redis just leaves the cache cold"""
+        if self.redis is None:
+            self._cache.set(*self._file_key(key), data)
+            return
+        try:
+            pipeline = self.redis.pipeline()
+            for suffix, value in _encode_payload(data).items():
+                pipeline.setex(key + suffix, ttl, value)
+            pipeline.execute()
+        except (redis.RedisError, TypeError, ValueError):
+            pass
+    
+    @staticmethod
+    def _connect_redis():
+        """Connect to REDIS_URL; None (disk cache) when it is unset, redis isn't installed or the server is down"""
+        url = os.getenv('REDIS_URL')
+        if not url or redis is None:
+            return None
+        try:
+            client = redis.Redis.from_url(url, decode_responses=False, socket_connect_timeout=2, socket_timeout=2)
+            client.ping()
+            return client
+        except (redis.RedisError, ValueError):
+            return None
+    
+    @staticmethod
+    def _file_key(key: str) -> Tuple[str, str]:
+        """Map a source:symbol:data_type key onto FileCache's (symbol, endpoint)"""
+        source, symbol, data_type = key.split(':', 2)
+        return symbol, f"{source}_{data_type}"
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Get the pooled client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # HTTP/2 multiplexes concurrent calls to one host (e.g. Polygon trades/quotes/news) on one connection
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=10.0
+            )
+            self._client_loop = loop
+            self._semaphores = {}
+            self._inflight = {}
+        return self._client
+    
+    def _host_semaphore(self, source: str) -> asyncio.Semaphore:
+        """Get the concurrency limit shared by every source on the same host"""
+        host = urlparse(self.sources[source].base_url).netloc or source
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+        return semaphore
+
+def _decode_json(content: bytes):
+    """Parse a JSON body with orjson when installed"""
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def _dumps(data) -> bytes:
+    return orjson.dumps(data) if orjson is not None else json.dumps(data).encode('utf-8')
+
+def _encode_payload(data: Dict) -> Dict[str, bytes]:
+    """Serialize a response for Redis as {key suffix: bytes}: JSON, plus one Arrow IPC entry per DataFrame"""
+    if pa is None:
+        if any(isinstance(value, (pd.DataFrame, pd.Series)) for value in data.values()):
+            return {"": b'p' + pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)}
+        return {"": b'j' + _dumps(data)}
+    
+    frames = [name for name, value in data.items() if isinstance(value, pd.DataFrame)]
+    if not frames:
+        return {"": b'j' + _dumps(data)}
+    
+    entries = {f":{name}.arrow": pa.ipc.serialize_pandas(data[name]).to_pybytes() for name in frames}
+    rest = {name: value for name, value in data.items() if name not in frames}
+    entries[""] = b'a' + _dumps({"data": rest, "frames": frames})
+    return entries
+
+def _decode_payload(payload: bytes) -> Tuple[Dict, List[str]]:
+    """Inverse of _encode_payload's main entry: the data plus the names of DataFrames stored alongside it"""
+    if payload[:1] == b'p':
+        return pickle.loads(payload[1:]), []
+    data = orjson.loads(payload[1:]) if orjson is not None else json.loads(payload[1:])
+    if payload[:1] == b'a':
+        return data["data"], data["frames"]
+    return data, []
+
+class _AsyncByteReader:
+    """Async file-like view of an httpx byte stream, as ijson expects"""
+    
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson accepts short reads; only an empty result means end of stream
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+def _items_at(data, prefix: str):
+    """Walk an ijson-style prefix ("results.item") through an already parsed response"""
+    for part in prefix.split('.'):
+        if part == 'item':
+            break
+        data = data.get(part, []) if isinstance(data, dict) else []
+    return data if isinstance(data, list) else []
+
+class _RequestBatcher:
+    """Queue (symbol, data_type) requests briefly and dispatch each window as one deduplicated batch"""
+    
+    def __init__(self, dispatch, max_batch_size: int = 5, max_queue_time: float = 0.2):
+        # dispatch(client, keys) -> {key: result}
+        self.dispatch = dispatch
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._loop = None
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._client = None
+        self._timer = None
+        self._tasks = set()
+    
+    async def process(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
+        """Queue one request and wait for its share of the batch result"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+            self._timer = None
+        
+        key = (symbol, data_type)
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = loop.create_future()
+            self._client = client
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_queue_time, self._flush)
+        return await asyncio.shield(future)
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._run(self._client, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, client: "httpx.AsyncClient", batch: Dict[Tuple[str, str], asyncio.Future]):
+        try:
+            results = await self.dispatch(client, list(batch))
+        except Exception as e:
+            results = {key: {"error": str(e)} for key in batch}
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key, {"error": "No result in batch"}))
+
+class DataSource:
+    """Base data source: subclasses map each data type to an HTTP GET"""
+    
+    name = "Data source"
+    unavailable_error = "API key not available"
+    base_url = ""
+    
+    # Data type -> ijson prefix of the record list, for types worth streaming
+    STREAM_PREFIXES: Dict[str, str] = {}
+    
+    # Concurrent requests per get_data_bulk call
+    rate_limit = HOST_CONCURRENCY
+    
+    def __init__(self):
+        # Keep-alive session for blocking calls; async calls use the manager's shared client
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'CROC'})
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+        """Return (url, params) for a data type, or None when unsupported"""
+        return None
+    
+    async def get_data(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
+        """Get data from this source"""
+        if not self.is_available():
+            return {"error": self.unavailable_error}
+        
+        try:
+            request = self._request(symbol, data_type)
+            if request is None:
+                return {"error": f"Data type {data_type} not supported"}
+            
+            url, params = request
+            response = await client.get(url, params=params)
+            return self._result(data_type, response.status_code, response.content)
+            
+        except Exception as e:
+            return {"error": f"{self.name} error: {str(e)}"}
+    
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
+        """Blocking get_data over this source's session"""
+        if not self.is_available():
+            return {"error": self.unavailable_error}
+        
+        try:
+            request = self._request(symbol, data_type)
+            if request is None:
+                return {"error": f"Data type {data_type} not supported"}
+            
+            url, params = request
+            response = self.session.get(url, params=params, timeout=10)
+            return self._result(data_type, response.status_code, response.content)
+            
+        except Exception as e:
+            return {"error": f"{self.name} error: {str(e)}"}
+    
+    def _decode(self, data_type: str, content: bytes) -> Dict:
+        """Parse a response body for a data type"""
+        return _decode_json(content)
+    
+    def _result(self, data_type: str, status_code: int, content: bytes) -> Dict:
+        """Decode a response; HTTP errors and error payloads become error dicts, which are never cached"""
+        if not 200 <= status_code < 300:
+            return {"error": f"{self.name} error: HTTP {status_code}"}
+        data = self._decode(data_type, content)
+        message = self._payload_error(data)
+        if message:
+            return {"error": f"{self.name} error: {message}"}
+        return data
+    
+    def _payload_error(self, data) -> Optional[str]:
+        """Return the error message of a payload the API sent with HTTP 200, or None"""
+        return None
+    
+    async def get_data_bulk(self, client: "httpx.AsyncClient", symbols: List[str], data_type: str) -> Dict[str, Dict]:
+        """Fetch one data type for many symbols concurrently, at most rate_limit at a time"""
+        semaphore = asyncio.Semaphore(self.rate_limit)
+        results = await asyncio.gather(
+            *[self._get_data_limited(semaphore, client, symbol, data_type) for symbol in symbols],
+            return_exceptions=True
+        )
+        return {
+            symbol: {"error": str(result)} if isinstance(result, BaseException) else result
+            for symbol, result in zip(symbols, results)
+        }
+    
+    async def _get_data_limited(self, semaphore: asyncio.Semaphore, client: "httpx.AsyncClient",
+                                symbol: str, data_type: str) -> Dict:
+        """get_data gated by a shared semaphore"""
+        async with semaphore:
+            return await self.get_data(client, symbol, data_type)
+    
+    async def get_data_stream(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> AsyncIterator[Dict]:
+        """Yield records of a list response one at a time instead of materializing the body"""
+        prefix = self.STREAM_PREFIXES.get(data_type)
+        request = self._request(symbol, data_type) if self.is_available() else None
+        if prefix is None or request is None:
+            raise ValueError(f"{self.name} cannot stream data type {data_type}")
+        
+        url, params = request
+        async with client.stream("GET", url, params=params) as response:
+            if ijson is not None:
+                async for record in ijson.items(_AsyncByteReader(response.aiter_bytes()), prefix, use_float=True):
+                    yield record
+            else:
+                for record in _items_at(_decode_json(await response.aread()), prefix):
+                    yield record
 
-class YahooFinanceSource:
+class LocalDataSource(DataSource):
+    """Source answered without a network call; subclasses implement get_data_sync"""
+    
+    async def get_data(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
+        return self.get_data_sync(symbol, data_type)
+
+class YahooFinanceSource(DataSource):
     """Yahoo Finance data source (already implemented)"""
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
+    name = "Yahoo Finance"
+    
+    async def get_data(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
         """Get data from Yahoo Finance"""
+        # yfinance is blocking, so keep it off the event loop
+        return await asyncio.to_thread(self.get_data_sync, symbol, data_type)
+    
+    async def get_data_bulk(self, client: "httpx.AsyncClient", symbols: List[str], data_type: str) -> Dict[str, Dict]:
+        """Fetch many symbols; basic data downloads every history in one batched request"""
+        if data_type != "basic":
+            return await super().get_data_bulk(client, symbols, data_type)
+        
+        try:
+            histories = await asyncio.to_thread(self.get_history_bulk, symbols)
+        except Exception as e:
+            return {symbol: {"error": f"Yahoo Finance error: {str(e)}"} for symbol in symbols}
+        
+        semaphore = asyncio.Semaphore(self.rate_limit)
+        infos = await asyncio.gather(
+            *[self._info_limited(semaphore, symbol) for symbol in symbols],
+            return_exceptions=True
+        )
+        return {
+            symbol: {"error": f"Yahoo Finance error: {str(info)}"} if isinstance(info, BaseException)
+            else {"info": info, "history": histories[symbol]} if symbol in histories
+            else {"error": f"No price history for {symbol}"}
+            for symbol, info in zip(symbols, infos)
+        }
+    
+    def get_history_bulk(self, symbols: List[str], period: str = "1y") -> Dict[str, pd.DataFrame]:
+        """Download daily history for many symbols in one threaded yf.download call; symbols with no rows are left out"""
+        tickers = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        data = yf.download(
+            tickers, period=period, group_by="ticker", actions=True,
+            ignore_tz=False, threads=True, progress=False
+        )
+        if data.empty:
+            return {}
+        
+        # Older yfinance returns flat columns for a single ticker
+        if isinstance(data.columns, pd.MultiIndex):
+            frames = {ticker: data[ticker] for ticker in set(data.columns.get_level_values(0))}
+        else:
+            frames = {tickers[0]: data} if len(tickers) == 1 else {}
+        
+        histories = {}
+        for symbol in symbols:
+            frame = frames.get(symbol.upper())
+            if frame is None:
+                continue
+            # Tickers share one index, so drop the rows that only exist for other symbols
+            frame = frame.dropna(how='all')
+            if not frame.empty:
+                histories[symbol] = frame
+        return histories
+    
+    async def _info_limited(self, semaphore: asyncio.Semaphore, symbol: str) -> Dict:
+        """Ticker.info in a worker thread, gated by a shared semaphore"""
+        async with semaphore:
+            return await asyncio.to_thread(lambda: yf.Ticker(symbol).info)
+    
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
+        """Fetch through yfinance"""
         try:
             ticker = yf.Ticker(symbol)
             
             if data_type == "basic":
                 info = ticker.info
-                hist = ticker.history(period="1y")
+                hist = self.get_history_bulk([symbol]).get(symbol)
+                if hist is None:
+                    return {"error": f"No price history for {symbol}"}
                 return {"info": info, "history": hist}
             
             elif data_type == "options":
@@ -73,172 +647,178 @@ class YahooFinanceSource:
         except Exception as e:
             return {"error": f"Yahoo Finance error: {str(e)}"}
 
-class AlphaVantageSource:
+class AlphaVantageSource(DataSource):
     """Alpha Vantage API data source"""
     
+    name = "Alpha Vantage"
+    unavailable_error = "Alpha Vantage API key not available"
+    base_url = "https://www.alphavantage.co/query"
+    rate_limit = 5  # Free tier allows a burst of five calls
+    
+    STREAM_PREFIXES = {
+        'earnings': 'quarterlyEarnings.item',
+        'income_statement': 'quarterlyReports.item'
+    }
+    
+    # Our data type -> Alpha Vantage function
+    FUNCTIONS = {
+        'fundamental': 'OVERVIEW',
+        'earnings': 'EARNINGS',
+        'income_statement': 'INCOME_STATEMENT'
+    }
+    
+    # Free tier: five calls per rolling minute
+    CALLS_PER_MINUTE = 5
+    
     def __init__(self):
+        super().__init__()
         self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-        self.base_url = "https://www.alphavantage.co/query"
+        # Bursts of callers are coalesced and paced instead of racing the quota
+        self._batcher = _RequestBatcher(self._dispatch_batch, max_batch_size=5, max_queue_time=0.2)
+        self._call_times = deque(maxlen=self.CALLS_PER_MINUTE)
     
     def is_available(self) -> bool:
         return bool(self.api_key)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
-        """Get data from Alpha Vantage"""
+    async def get_data(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
+        """Get data through the request batcher"""
         if not self.is_available():
-            return {"error": "Alpha Vantage API key not available"}
-        
-        try:
-            if data_type == "fundamental":
-                params = {
-                    'function': 'OVERVIEW',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                response = requests.get(self.base_url, params=params)
-                return response.json()
-            
-            elif data_type == "earnings":
-                params = {
-                    'function': 'EARNINGS',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                response = requests.get(self.base_url, params=params)
-                return response.json()
-            
-            elif data_type == "income_statement":
-                params = {
-                    'function': 'INCOME_STATEMENT',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                response = requests.get(self.base_url, params=params)
-                return response.json()
-            
-            else:
-                return {"error": f"Data type {data_type} not supported"}
-                
-        except Exception as e:
-            return {"error": f"Alpha Vantage error: {str(e)}"}
+            return {"error": self.unavailable_error}
+        return await self._batcher.process(client, symbol, data_type)
+    
+    async def _dispatch_batch(self, client: "httpx.AsyncClient", keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Fetch a deduplicated batch, each call waiting for a slot in the per-minute window"""
+        results = await asyncio.gather(*[self._get_data_throttled(client, symbol, data_type) for symbol, data_type in keys])
+        return dict(zip(keys, results))
+    
+    async def _get_data_throttled(self, client: "httpx.AsyncClient", symbol: str, data_type: str) -> Dict:
+        await self._throttle()
+        return await super().get_data(client, symbol, data_type)
+    
+    async def _throttle(self):
+        """Wait for a free slot in the rolling per-minute call window"""
+        now = time.monotonic()
+        start = now
+        if len(self._call_times) == self._call_times.maxlen:
+            start = max(now, self._call_times[0] + 60)
+        # Reserve the slot before sleeping so concurrent callers queue behind it
+        self._call_times.append(start)
+        if start > now:
+            await asyncio.sleep(start - now)
+    
+    def _payload_error(self, data) -> Optional[str]:
+        """Throttling notices and bad symbols arrive as HTTP 200 with one of these keys"""
+        if isinstance(data, dict):
+            for key in ('Error Message', 'Note', 'Information'):
+                if data.get(key):
+                    return str(data[key])
+        return None
+    
+    def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+        function = self.FUNCTIONS.get(data_type)
+        if function is None:
+            return None
+        return self.base_url, {
+            'function': function,
+            'symbol': symbol,
+            'apikey': self.api_key
+        }
 
-class PolygonSource:
+class PolygonSource(DataSource):
     """Polygon.io API data source"""
     
+    name = "Polygon"
+    unavailable_error = "Polygon API key not available"
+    base_url = "https://api.polygon.io"
+    
+    STREAM_PREFIXES = {
+        'trades': 'results.item',
+        'quotes': 'results.item',
+        'news': 'results.item'
+    }
+    
     def __init__(self):
+        super().__init__()
         self.api_key = os.getenv('POLYGON_API_KEY')
-        self.base_url = "https://api.polygon.io"
     
     def is_available(self) -> bool:
         return bool(self.api_key)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
-        """Get data from Polygon.io"""
-        if not self.is_available():
-            return {"error": "Polygon API key not available"}
-        
-        try:
-            if data_type == "trades":
-                url = f"{self.base_url}/v3/trades/{symbol}"
-                params = {'apikey': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            elif data_type == "quotes":
-                url = f"{self.base_url}/v3/quotes/{symbol}"
-                params = {'apikey': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            elif data_type == "news":
-                url = f"{self.base_url}/v2/reference/news"
-                params = {'ticker': symbol, 'apikey': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            else:
-                return {"error": f"Data type {data_type} not supported"}
-                
-        except Exception as e:
-            return {"error": f"Polygon error: {str(e)}"}
+    def _payload_error(self, data) -> Optional[str]:
+        if isinstance(data, dict) and data.get('status') == 'ERROR':
+            return str(data.get('error') or data.get('message') or 'request failed')
+        return None
+    
+    def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+        if data_type == "trades":
+            return f"{self.base_url}/v3/trades/{symbol}", {'apikey': self.api_key}
+        elif data_type == "quotes":
+            return f"{self.base_url}/v3/quotes/{symbol}", {'apikey': self.api_key}
+        elif data_type == "news":
+            return f"{self.base_url}/v2/reference/news", {'ticker': symbol, 'apikey': self.api_key}
+        return None
 
-class FinnhubSource:
+class FinnhubSource(DataSource):
     """Finnhub API data source"""
     
+    name = "Finnhub"
+    unavailable_error = "Finnhub API key not available"
+    base_url = "https://finnhub.io/api/v1"
+    
+    # Our data type -> Finnhub path
+    PATHS = {
+        'profile': '/stock/profile2',
+        'recommendations': '/stock/recommendation',
+        'sentiment': '/news-sentiment'
+    }
+    
     def __init__(self):
+        super().__init__()
         self.api_key = os.getenv('FINNHUB_API_KEY')
-        self.base_url = "https://finnhub.io/api/v1"
     
     def is_available(self) -> bool:
         return bool(self.api_key)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
-        """Get data from Finnhub"""
-        if not self.is_available():
-            return {"error": "Finnhub API key not available"}
-        
-        try:
-            if data_type == "profile":
-                url = f"{self.base_url}/stock/profile2"
-                params = {'symbol': symbol, 'token': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            elif data_type == "recommendations":
-                url = f"{self.base_url}/stock/recommendation"
-                params = {'symbol': symbol, 'token': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            elif data_type == "sentiment":
-                url = f"{self.base_url}/news-sentiment"
-                params = {'symbol': symbol, 'token': self.api_key}
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            else:
-                return {"error": f"Data type {data_type} not supported"}
-                
-        except Exception as e:
-            return {"error": f"Finnhub error: {str(e)}"}
+    def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+        path = self.PATHS.get(data_type)
+        if path is None:
+            return None
+        return f"{self.base_url}{path}", {'symbol': symbol, 'token': self.api_key}
 
-class NewsAPISource:
+class NewsAPISource(DataSource):
     """News API data source"""
     
+    name = "News API"
+    unavailable_error = "News API key not available"
+    base_url = "https://newsapi.org/v2"
+    
     def __init__(self):
+        super().__init__()
         self.api_key = os.getenv('NEWS_API_KEY')
-        self.base_url = "https://newsapi.org/v2"
     
     def is_available(self) -> bool:
         return bool(self.api_key)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
-        """Get news data"""
-        if not self.is_available():
-            return {"error": "News API key not available"}
-        
-        try:
-            if data_type == "headlines":
-                url = f"{self.base_url}/everything"
-                params = {
-                    'q': symbol,
-                    'apiKey': self.api_key,
-                    'sortBy': 'publishedAt',
-                    'pageSize': 20
-                }
-                response = requests.get(url, params=params)
-                return response.json()
-            
-            else:
-                return {"error": f"Data type {data_type} not supported"}
-                
-        except Exception as e:
-            return {"error": f"News API error: {str(e)}"}
+    def _payload_error(self, data) -> Optional[str]:
+        if isinstance(data, dict) and data.get('status') == 'error':
+            return str(data.get('message') or data.get('code') or 'request failed')
+        return None
+    
+    def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+        if data_type != "headlines":
+            return None
+        return f"{self.base_url}/everything", {
+            'q': symbol,
+            'apiKey': self.api_key,
+            'sortBy': 'publishedAt',
+            'pageSize': 20
+        }
 
-class RedditAPISource:
+class RedditAPISource(LocalDataSource):
     """Reddit API data source"""
     
     def __init__(self):
+        super().__init__()
         self.client_id = os.getenv('REDDIT_CLIENT_ID')
         self.client_secret = os.getenv('REDDIT_CLIENT_SECRET')
         self.user_agent = "CROC Investment Fund Bot"
@@ -246,7 +826,7 @@ class RedditAPISource:
     def is_available(self) -> bool:
         return bool(self.client_id and self.client_secret)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
         """Get Reddit sentiment data"""
         if not self.is_available():
             return {"error": "Reddit API credentials not available"}
@@ -264,17 +844,18 @@ class RedditAPISource:
         except Exception as e:
             return {"error": f"Reddit API error: {str(e)}"}
 
-class TwitterAPISource:
+class TwitterAPISource(LocalDataSource):
     """Twitter API data source"""
     
     def __init__(self):
+        super().__init__()
         self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
         self.base_url = "https://api.twitter.com/2"
     
     def is_available(self) -> bool:
         return bool(self.bearer_token)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
         """Get Twitter data"""
         if not self.is_available():
             return {"error": "Twitter API credentials not available"}
@@ -290,14 +871,15 @@ class TwitterAPISource:
         except Exception as e:
             return {"error": f"Twitter API error: {str(e)}"}
 
-class SECEdgarSource:
+class SECEdgarSource(LocalDataSource):
     """SEC EDGAR data source"""
     
     def __init__(self):
+        super().__init__()
         self.base_url = "https://data.sec.gov"
         self.user_agent = "CROC Investment Fund contact@example.com"
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
         """Get SEC filings data"""
         try:
             if data_type == "filings":
@@ -315,17 +897,18 @@ class SECEdgarSource:
         except Exception as e:
             return {"error": f"SEC EDGAR error: {str(e)}"}
 
-class FREDSource:
+class FREDSource(LocalDataSource):
     """Federal Reserve Economic Data source"""
     
     def __init__(self):
+        super().__init__()
         self.api_key = os.getenv('FRED_API_KEY')
         self.base_url = "https://api.stlouisfed.org/fred"
     
     def is_available(self) -> bool:
         return bool(self.api_key)
     
-    def get_data(self, symbol: str, data_type: str) -> Dict:
+    def get_data_sync(self, symbol: str, data_type: str) -> Dict:
         """Get economic data"""
         if not self.is_available():
             return {"error": "FRED API key not available"}
@@ -350,24 +933,29 @@ def add_data_source_to_app():
     """
     How to add a new data source to your CROC Investment Fund app:
     
-    1. Create a new class inheriting from a base data source
-    2. Implement the get_data method
+    1. Create a new class inheriting from DataSource
+    2. Implement _request (or override the async get_data method)
     3. Add API key to .env file
     4. Update the DataSourceManager
     5. Add UI components to display the data
     """
     
     # Example: Adding a new data source
-    class CustomDataSource:
+    class CustomDataSource(DataSource):
+        name = "Custom API"
+        unavailable_error = "Custom API key not available"
+        base_url = "https://api.example.com"
+        
         def __init__(self):
+            super().__init__()
             self.api_key = os.getenv('CUSTOM_API_KEY')
         
         def is_available(self) -> bool:
             return bool(self.api_key)
         
-        def get_data(self, symbol: str, data_type: str) -> Dict:
-            # Your custom data fetching logic here
-            return {"data": "custom_data"}
+        def _request(self, symbol: str, data_type: str) -> Optional[Tuple[str, Dict]]:
+            # Your custom endpoint and query parameters here
+            return f"{self.base_url}/{data_type}", {'symbol': symbol, 'apikey': self.api_key}
     
     return CustomDataSource()
 
@@ -376,15 +964,15 @@ def integrate_alpha_vantage():
     """Example: How to integrate Alpha Vantage"""
     
     # 1. Add to requirements.txt
-    # requests>=2.28.0
+    # httpx>=0.23.0
     
     # 2. Add API key to .env
     # ALPHA_VANTAGE_API_KEY=your_key_here
     
     # 3. Use in your app
-    source = AlphaVantageSource()
-    if source.is_available():
-        data = source.get_data("AAPL", "fundamental")
+    manager = DataSourceManager()
+    if manager.sources['alpha_vantage'].is_available():
+        data = manager.get_data("alpha_vantage", "AAPL", "fundamental")
         print(f"Alpha Vantage data: {data}")
     else:
         print("Alpha Vantage not available")
@@ -396,9 +984,9 @@ def integrate_polygon():
     # POLYGON_API_KEY=your_key_here
     
     # 2. Use in your app
-    source = PolygonSource()
-    if source.is_available():
-        data = source.get_data("AAPL", "trades")
+    manager = DataSourceManager()
+    if manager.sources['polygon'].is_available():
+        data = manager.get_data("polygon", "AAPL", "trades")
         print(f"Polygon data: {data}")
     else:
         print("Polygon not available")
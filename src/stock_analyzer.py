@@ -33,14 +33,15 @@ class StockAnalyzer:
             logger.info(f"Starting analysis for {symbol}")
             
             # Fetch all required data
-            stock_info = self.data_fetcher.get_stock_info(symbol)
+            bundle = self.data_fetcher.get_bundle(symbol)
+            stock_info = bundle['stock_info']
             if not stock_info:
                 return {'error': f'Could not fetch data for {symbol}'}
             
-            key_metrics = self.data_fetcher.get_key_metrics(symbol)
-            financial_statements = self.data_fetcher.get_financial_statements(symbol)
-            analyst_recommendations = self.data_fetcher.get_analyst_recommendations(symbol)
-            historical_data = self.data_fetcher.get_historical_data(symbol)
+            key_metrics = bundle['key_metrics']
+            financial_statements = bundle['financial_statements']
+            analyst_recommendations = bundle['analyst_recommendations']
+            historical_data = bundle['historical_data']
             
             # Calculate additional metrics from financial statements
             additional_metrics = self._calculate_additional_metrics(financial_statements)
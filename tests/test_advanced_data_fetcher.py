@@ -0,0 +1,62 @@
+"""
+Unit tests for the advanced data fetcher's technical kernel
+"""
+
+import unittest
+from unittest import mock
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from advanced_data_fetcher import AdvancedDataFetcher, _technical_kernel
+
+class TestTechnicalKernel(unittest.TestCase):
+    """Test _technical_kernel on arrays taken straight from a DataFrame"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        close = 100 + rng.normal(0, 1, 60).cumsum()
+        self.hist = pd.DataFrame({
+            'Close': close,
+            'High': close + 1,
+            'Low': close - 1,
+            'Volume': rng.integers(1_000, 2_000, 60)
+        }, index=pd.date_range('2024-01-01', periods=60))
+    
+    def _columns(self):
+        return [self.hist[column].to_numpy(np.float64) for column in ['Close', 'High', 'Low', 'Volume']]
+    
+    def test_accepts_dataframe_columns(self):
+        """Test the kernel runs on to_numpy() output, which may be a read-only view"""
+        close, high, low, volume = self._columns()
+        result = _technical_kernel(close, high, low, volume)
+        
+        macd = self.hist['Close'].ewm(span=12).mean() - self.hist['Close'].ewm(span=26).mean()
+        self.assertEqual(len(result), 10)
+        self.assertAlmostEqual(result[0], macd.iloc[-1], places=6)
+        self.assertAlmostEqual(result[1], macd.ewm(span=9).mean().iloc[-1], places=6)
+        self.assertAlmostEqual(result[9], self.hist['Volume'].iloc[-20:].mean(), places=6)
+    
+    def test_accepts_read_only_arrays(self):
+        """Test read-only inputs are accepted explicitly"""
+        columns = [column.copy() for column in self._columns()]
+        for column in columns:
+            column.flags.writeable = False
+        self.assertEqual(len(_technical_kernel(*columns)), 10)
+    
+    def test_advanced_indicators_not_empty(self):
+        """Test get_advanced_technical_indicators returns values for a DataFrame history"""
+        fetcher = AdvancedDataFetcher()
+        with mock.patch.object(fetcher, '_history', return_value=self.hist):
+            indicators = fetcher.get_advanced_technical_indicators('TEST')
+        self.assertIn('macd', indicators)
+        self.assertAlmostEqual(indicators['avg_volume_20d'], self.hist['Volume'].iloc[-20:].mean(), places=6)
+
+if __name__ == '__main__':
+    unittest.main()
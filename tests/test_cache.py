@@ -0,0 +1,107 @@
+"""
+Unit tests for the persistent file cache
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from tools.cache import FileCache
+
+class TestFileCache(unittest.TestCase):
+    """Test FileCache storage, expiry and key layout"""
+    
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = FileCache(ttl_seconds=60, cache_dir=self.cache_dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_round_trip(self):
+        """Test a stored value is read back"""
+        self.cache.set('AAPL', 'info', {'price': 1.0})
+        self.assertEqual(self.cache.get('AAPL', 'info'), {'price': 1.0})
+    
+    def test_missing_returns_none(self):
+        """Test a miss returns None"""
+        self.assertIsNone(self.cache.get('AAPL', 'info'))
+    
+    def test_expired_entry(self):
+        """Test entries older than the TTL are ignored"""
+        self.cache.set('AAPL', 'info', {'price': 1.0})
+        self.assertIsNone(self.cache.get('AAPL', 'info', ttl_seconds=-1))
+        self.assertIsNotNone(self.cache.get('AAPL', 'info', ttl_seconds=60))
+    
+    def test_params_are_part_of_key(self):
+        """Test different params are stored separately"""
+        self.cache.set('AAPL', 'history', 'one', params={'period': '1y'})
+        self.cache.set('AAPL', 'history', 'two', params={'period': '2y'})
+        self.assertEqual(self.cache.get('AAPL', 'history', params={'period': '1y'}), 'one')
+        self.assertEqual(self.cache.get('AAPL', 'history', params={'period': '2y'}), 'two')
+    
+    def test_symbol_is_case_insensitive(self):
+        """Test lowercase symbols share the upper-case entry"""
+        self.cache.set('aapl', 'info', 1)
+        self.assertEqual(self.cache.get('AAPL', 'info'), 1)
+    
+    def test_cache_dirs_are_separate_namespaces(self):
+        """Test two caches with different directories don't see each other's entries"""
+        other = FileCache(ttl_seconds=60, cache_dir=os.path.join(self.cache_dir, 'other'))
+        self.cache.set('AAPL', 'history', 'mine', params={'period': '2y'})
+        self.assertIsNone(other.get('AAPL', 'history', params={'period': '2y'}))
+    
+    def test_unsafe_symbol_stays_inside_cache_dir(self):
+        """Test path-like symbols are hashed instead of joined into the path"""
+        root = os.path.realpath(self.cache_dir)
+        for symbol in ['../../etc', '..', '/tmp/x', 'A/B']:
+            path = os.path.realpath(self.cache._path(symbol, 'info'))
+            self.assertTrue(path.startswith(root + os.sep), symbol)
+            self.assertEqual(os.path.dirname(path), os.path.join(root, os.path.basename(os.path.dirname(path))))
+        
+        self.cache.set('../x', 'info', 1)
+        self.assertEqual(self.cache.get('../x', 'info'), 1)
+    
+    def test_ticker_symbols_kept_readable(self):
+        """Test ordinary tickers map to their own directory"""
+        for symbol in ['AAPL', 'BRK-B', 'BRK.B', '^GSPC', 'EURUSD=X']:
+            self.assertEqual(os.path.basename(os.path.dirname(self.cache._path(symbol, 'info'))), symbol)
+    
+    def test_get_or_fetch(self):
+        """Test fetch runs on a miss only"""
+        calls = []
+        
+        def fetch():
+            calls.append(time.time())
+            return 'value'
+        
+        self.assertEqual(self.cache.get_or_fetch('AAPL', 'info', fetch), 'value')
+        self.assertEqual(self.cache.get_or_fetch('AAPL', 'info', fetch), 'value')
+        self.assertEqual(len(calls), 1)
+    
+    def test_get_or_fetch_skips_empty_results(self):
+        """Test empty DataFrames, dicts and lists are returned but not stored"""
+        for empty in [pd.DataFrame(), {}, [], None]:
+            calls = []
+            
+            def fetch():
+                calls.append(1)
+                return empty
+            
+            self.cache.get_or_fetch('AAPL', 'history', fetch)
+            self.cache.get_or_fetch('AAPL', 'history', fetch)
+            self.assertEqual(len(calls), 2, repr(empty))
+        
+        frame = pd.DataFrame({'Close': [1.0]})
+        self.cache.get_or_fetch('AAPL', 'history', lambda: frame)
+        self.assertTrue(self.cache.get('AAPL', 'history').equals(frame))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+"""
+Unit tests for the data source manager's async plumbing
+"""
+
+import unittest
+from unittest import mock
+import asyncio
+import json
+import sys
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import data_sources_guide
+from data_sources_guide import (
+    AlphaVantageSource, DataSourceManager, _RequestBatcher, _decode_payload, _encode_payload
+)
+from tools.cache import FileCache
+
+class FakeResponse:
+    """Minimal httpx.Response stand-in"""
+    
+    def __init__(self, payload, status_code: int = 200):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode()
+
+class FakeAsyncClient:
+    """Async client that answers every GET with its params (or a fixed payload), after a short delay"""
+    
+    def __init__(self, delay: float = 0.05, payload=None, status_code: int = 200):
+        self.delay = delay
+        self.payload = payload
+        self.status_code = status_code
+        self.calls = []
+    
+    async def get(self, url, params=None):
+        self.calls.append((url, dict(params or {})))
+        await asyncio.sleep(self.delay)
+        payload = self.payload if self.payload is not None else {"url": url, "symbol": (params or {}).get('symbol')}
+        return FakeResponse(payload, self.status_code)
+
+class FakeRedis:
+    """Dict-backed Redis with the calls the manager uses"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+    
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+    
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+    
+    def execute(self):
+        self.redis.data.update(self.ops)
+
+class TestRequestBatcher(unittest.TestCase):
+    """Test the Alpha Vantage request batcher"""
+    
+    def setUp(self):
+        self.batches = []
+    
+    async def _dispatch(self, client, keys):
+        self.batches.append(list(keys))
+        return {key: {"symbol": key[0]} for key in keys}
+    
+    def test_duplicates_share_one_request(self):
+        """Test duplicate keys are dispatched once and every caller gets a result"""
+        batcher = _RequestBatcher(self._dispatch, max_batch_size=5, max_queue_time=0.01)
+        
+        async def run():
+            return await asyncio.gather(*[batcher.process(None, symbol, 'earnings') for symbol in ['A', 'B', 'A']])
+        
+        results = asyncio.run(run())
+        self.assertEqual(results, [{"symbol": "A"}, {"symbol": "B"}, {"symbol": "A"}])
+        self.assertEqual(self.batches, [[('A', 'earnings'), ('B', 'earnings')]])
+    
+    def test_full_batch_flushes_without_waiting(self):
+        """Test reaching max_batch_size dispatches before max_queue_time"""
+        batcher = _RequestBatcher(self._dispatch, max_batch_size=2, max_queue_time=60)
+        
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*[batcher.process(None, symbol, 'earnings') for symbol in ['A', 'B', 'C', 'D']]),
+                timeout=1
+            )
+        
+        asyncio.run(run())
+        self.assertEqual([len(batch) for batch in self.batches], [2, 2])
+    
+    def test_dispatch_error_reaches_every_caller(self):
+        """Test a failing dispatch resolves each caller with an error dict"""
+        async def failing(client, keys):
+            raise RuntimeError("boom")
+        
+        batcher = _RequestBatcher(failing, max_queue_time=0.01)
+        
+        async def run():
+            return await asyncio.gather(*[batcher.process(None, symbol, 'earnings') for symbol in ['A', 'B']])
+        
+        self.assertEqual(asyncio.run(run()), [{"error": "boom"}, {"error": "boom"}])
+    
+    def test_reusable_across_event_loops(self):
+        """Test the batcher works under a second asyncio.run"""
+        batcher = _RequestBatcher(self._dispatch, max_queue_time=0.01)
+        for symbol in ['A', 'B']:
+            self.assertEqual(asyncio.run(batcher.process(None, symbol, 'earnings')), {"symbol": symbol})
+
+class TestAlphaVantageThrottle(unittest.TestCase):
+    """Test Alpha Vantage's batching and rolling per-minute window"""
+    
+    def setUp(self):
+        self.source = AlphaVantageSource()
+        self.source.api_key = 'test'
+    
+    def test_throttle_allows_a_burst_then_waits(self):
+        """Test the first CALLS_PER_MINUTE calls start at once and the next waits out the window"""
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+        
+        async def run():
+            for _ in range(self.source.CALLS_PER_MINUTE + 1):
+                await self.source._throttle()
+        
+        with mock.patch.object(data_sources_guide.asyncio, 'sleep', fake_sleep):
+            asyncio.run(run())
+        
+        self.assertEqual(len(sleeps), 1)
+        self.assertGreater(sleeps[0], 59)
+        self.assertLessEqual(sleeps[0], 60)
+    
+    def test_get_data_coalesces_duplicates(self):
+        """Test concurrent identical calls reach the API once"""
+        client = FakeAsyncClient(delay=0)
+        
+        async def run():
+            return await asyncio.gather(*[
+                self.source.get_data(client, symbol, 'earnings') for symbol in ['IBM', 'IBM', 'MSFT']
+            ])
+        
+        results = asyncio.run(run())
+        self.assertEqual([result['symbol'] for result in results], ['IBM', 'IBM', 'MSFT'])
+        self.assertEqual(sorted(params['symbol'] for _, params in client.calls), ['IBM', 'MSFT'])
+
+class TestPayloadEncoding(unittest.TestCase):
+    """Test the Redis payload format"""
+    
+    def setUp(self):
+        self.frame = pd.DataFrame(
+            {'Close': [1.0, 2.0]},
+            index=pd.date_range('2024-01-01', periods=2, tz='UTC', name='Date')
+        )
+    
+    def test_json_round_trip(self):
+        """Test plain responses are a single JSON entry"""
+        entries = _encode_payload({"price": 1.5, "name": "A"})
+        self.assertEqual(list(entries), [""])
+        self.assertEqual(_decode_payload(entries[""]), ({"price": 1.5, "name": "A"}, []))
+    
+    @unittest.skipIf(data_sources_guide.pa is None, "pyarrow not installed")
+    def test_dataframes_stored_as_arrow(self):
+        """Test DataFrames get their own Arrow entry next to the JSON fields"""
+        entries = _encode_payload({"info": {"a": 1}, "history": self.frame})
+        self.assertEqual(sorted(entries), ["", ":history.arrow"])
+        
+        data, frames = _decode_payload(entries[""])
+        self.assertEqual(data, {"info": {"a": 1}})
+        self.assertEqual(frames, ["history"])
+        self.assertTrue(data_sources_guide.pa.ipc.deserialize_pandas(entries[":history.arrow"]).equals(self.frame))
+    
+    def test_pickle_fallback_without_pyarrow(self):
+        """Test DataFrames still round-trip when pyarrow is missing"""
+        with mock.patch.object(data_sources_guide, 'pa', None):
+            entries = _encode_payload({"history": self.frame})
+        data, frames = _decode_payload(entries[""])
+        self.assertEqual(frames, [])
+        self.assertTrue(data["history"].equals(self.frame))
+    
+    @unittest.skipIf(data_sources_guide.pa is None, "pyarrow not installed")
+    def test_manager_round_trip_and_missing_frame(self):
+        """Test the manager reassembles a response, and treats a lost frame entry as a miss"""
+        manager = DataSourceManager()
+        manager.redis = FakeRedis()
+        key = "yahoo_finance:AAPL:basic"
+        manager._cache_set(key, 60, {"info": {"a": 1}, "history": self.frame})
+        
+        cached = manager._cache_get(key, 60)
+        self.assertEqual(cached["info"], {"a": 1})
+        self.assertTrue(cached["history"].equals(self.frame))
+        
+        del manager.redis.data[f"{key}:history.arrow"]
+        self.assertIsNone(manager._cache_get(key, 60))
+
+class TestInflightCoalescing(unittest.TestCase):
+    """Test DataSourceManager.aget_data sharing one fetch between identical calls"""
+    
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.manager = DataSourceManager()
+        self.manager.redis = None
+        self.manager._cache = FileCache(cache_dir=self.cache_dir)
+        self.manager.sources['finnhub'].api_key = 'test'
+        self.client = FakeAsyncClient()
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def _use_fake_client(self):
+        self.manager._client = self.client
+        self.manager._client_loop = asyncio.get_running_loop()
+    
+    def test_identical_calls_share_one_request(self):
+        """Test concurrent identical calls make one request"""
+        async def run():
+            self._use_fake_client()
+            return await asyncio.gather(*[self.manager.aget_data('finnhub', 'AAPL', 'profile') for _ in range(3)])
+        
+        results = asyncio.run(run())
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(self.manager._inflight, {})
+    
+    def test_cancelled_caller_does_not_cancel_waiters(self):
+        """Test cancelling the first caller leaves the shared fetch running for the others"""
+        async def run():
+            self._use_fake_client()
+            first = asyncio.ensure_future(self.manager.aget_data('finnhub', 'AAPL', 'profile'))
+            second = asyncio.ensure_future(self.manager.aget_data('finnhub', 'AAPL', 'profile'))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+        
+        result = asyncio.run(run())
+        self.assertNotIn('error', result)
+        self.assertEqual(len(self.client.calls), 1)
+    
+    def test_result_is_cached(self):
+        """Test a finished fetch is served from the cache afterwards"""
+        async def run():
+            self._use_fake_client()
+            await self.manager.aget_data('finnhub', 'AAPL', 'profile')
+            return await self.manager.aget_data('finnhub', 'AAPL', 'profile')
+        
+        asyncio.run(run())
+        self.assertEqual(len(self.client.calls), 1)
+
+class TestErrorResponsesNotCached(unittest.TestCase):
+    """Test HTTP errors and error payloads sent with HTTP 200 are never cached"""
+    
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.manager = DataSourceManager()
+        self.manager.redis = None
+        self.manager._cache = FileCache(cache_dir=self.cache_dir)
+        self.manager.sources['alpha_vantage'].api_key = 'test'
+        self.manager.sources['news_api'].api_key = 'test'
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def _fetch_twice(self, client, source, data_type):
+        # These tests are about caching, not the per-minute window
+        self.manager.sources['alpha_vantage']._call_times.clear()
+        
+        async def run():
+            self.manager._client = client
+            self.manager._client_loop = asyncio.get_running_loop()
+            first = await self.manager.aget_data(source, 'IBM', data_type)
+            second = await self.manager.aget_data(source, 'IBM', data_type)
+            return first, second
+        
+        return asyncio.run(run())
+    
+    def test_alpha_vantage_notices_not_cached(self):
+        """Test rate-limit notices and bad-symbol errors are returned as errors and refetched"""
+        for key in ['Note', 'Information', 'Error Message']:
+            client = FakeAsyncClient(delay=0, payload={key: "Thank you for using Alpha Vantage!"})
+            first, second = self._fetch_twice(client, 'alpha_vantage', 'fundamental')
+            self.assertIn('error', first, key)
+            self.assertIn('error', second, key)
+            self.assertEqual(len(client.calls), 2, key)
+    
+    def test_news_api_error_status_not_cached(self):
+        """Test NewsAPI's status=error bodies are errors"""
+        client = FakeAsyncClient(delay=0, payload={"status": "error", "code": "rateLimited", "message": "Too many requests"})
+        first, _ = self._fetch_twice(client, 'news_api', 'headlines')
+        self.assertEqual(first, {"error": "News API error: Too many requests"})
+        self.assertEqual(len(client.calls), 2)
+    
+    def test_http_error_not_cached(self):
+        """Test non-2xx responses are errors whatever their body"""
+        client = FakeAsyncClient(delay=0, payload={"Symbol": "IBM"}, status_code=503)
+        first, _ = self._fetch_twice(client, 'alpha_vantage', 'fundamental')
+        self.assertEqual(first, {"error": "Alpha Vantage error: HTTP 503"})
+        self.assertEqual(len(client.calls), 2)
+    
+    def test_valid_payload_is_cached(self):
+        """Test a normal payload is still cached"""
+        client = FakeAsyncClient(delay=0, payload={"Symbol": "IBM"})
+        first, second = self._fetch_twice(client, 'alpha_vantage', 'fundamental')
+        self.assertEqual(first, second)
+        self.assertEqual(len(client.calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Persistent File Cache
+Stores fetched market data on disk so warm reads skip the network
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Ticker-shaped symbols are used as directory names as-is; anything else is hashed
+_SAFE_SYMBOL = re.compile(r"[A-Z0-9^][A-Z0-9^=._-]{0,31}")
+
+class FileCache:
+    """Pickle cache under <cache_dir>/<symbol>/<endpoint>.pkl with a time-to-live; give each caller its own cache_dir"""
+    
+    def __init__(self, ttl_seconds: int = 300, cache_dir: str = ".cache"):
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+    
+    def _path(self, symbol: str, endpoint: str, params: Optional[Dict] = None) -> str:
+        """Build the cache file path, suffixing a digest of the request params"""
+        name = endpoint
+        if params:
+            digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+            name = f"{endpoint}_{digest}"
+        return os.path.join(self.cache_dir, self._symbol_dir(symbol), f"{name}.pkl")
+    
+    @staticmethod
+    def _symbol_dir(symbol: str) -> str:
+        """Directory name for a symbol; never escapes cache_dir"""
+        symbol = symbol.upper()
+        if _SAFE_SYMBOL.fullmatch(symbol):
+            return symbol
+        return "_" + hashlib.md5(symbol.encode()).hexdigest()
+    
+    def get(self, symbol: str, endpoint: str, params: Optional[Dict] = None,
+            ttl_seconds: Optional[int] = None) -> Optional[Any]:
+        """Return the cached value, or None when missing, unreadable or expired"""
+        try:
+            with open(self._path(symbol, endpoint, params), 'rb') as f:
+                timestamp, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return None
+        
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if time.time() - timestamp > ttl:
+            return None
+        return value
+    
+    def set(self, symbol: str, endpoint: str, value: Any, params: Optional[Dict] = None) -> None:
+        """Write the value with a timestamp header; failures leave the cache cold"""
+        path = self._path(symbol, endpoint, params)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((time.time(), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    def get_or_fetch(self, symbol: str, endpoint: str, fetch: Callable[[], Any],
+                     params: Optional[Dict] = None, ttl_seconds: Optional[int] = None) -> Any:
+        """Return the cached value, calling fetch and storing its result on a miss"""
+        value = self.get(symbol, endpoint, params, ttl_seconds)
+        if value is None:
+            value = fetch()
+            if _has_data(value):
+                self.set(symbol, endpoint, value, params)
+        return value
+
+def _has_data(value: Any) -> bool:
+    """False for None and empty DataFrames/dicts/lists, which are usually a failed or unknown-symbol fetch"""
+    if value is None:
+        return False
+    if getattr(value, 'empty', False) is True:
+        return False
+    if isinstance(value, (dict, list, tuple)) and not value:
+        return False
+    return True